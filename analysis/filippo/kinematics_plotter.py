@@ -15,6 +15,8 @@ def main():
     for root_file in files:
         data_io = DataIO(root_file, treename)
         plotter = Plotter(data_io)
+        # Reuse histograms filled by earlier runs while analysis.root is unchanged
+        plotter.use_hist_cache()
         # Extract the dataset name for the title
         dataset_name = root_file.split('/')[-2]  # e.g., 'PYTHIA8.ep_piplus___epic.25.08.0_5x41'
         plotter.update_plot_config('Q2', {'x_range': (1, max_Q2[files.index(root_file)])})
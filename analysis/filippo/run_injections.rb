@@ -9,6 +9,9 @@ include InjectionWorkflow
 # Environment setup
 ENV['LD_LIBRARY_PATH'] = "#{ENV['HOME']}/.local/lib64:#{ENV['LD_LIBRARY_PATH']}"
 
+# Local tasks that failed, across all studies below
+failed = []
+
 # Configuration Parameters
 # For the e+p 5x41 PYTHIA8 dataset
 config_5x41 = {
@@ -28,7 +31,7 @@ config_5x41 = {
   bins_per_slurm_job: 1
 }
 
-run_injection_workflow(config_5x41)
+failed += run_injection_workflow(config_5x41)
 
 # Configuration Parameters
 # For the e+p 10x100 PYTHIA8 dataset
@@ -49,7 +52,7 @@ config_10x100 = {
   bins_per_slurm_job: 1
 }
 
-run_injection_workflow(config_10x100)
+failed += run_injection_workflow(config_10x100)
 
 # Configuration Parameters
 # For the e+p 18x275 PYTHIA8 dataset
@@ -70,4 +73,10 @@ config_18x275 = {
   bins_per_slurm_job: 1
 }
 
-run_injection_workflow(config_18x275)
\ No newline at end of file
+failed += run_injection_workflow(config_18x275)
+
+# Exit non-zero when local tasks failed, so scripted runs notice
+unless failed.empty?
+  warn "#{failed.size} injection tasks failed: #{failed.map { |task| task[:name] }.join(', ')}"
+  exit 1
+end
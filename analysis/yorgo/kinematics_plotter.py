@@ -15,6 +15,8 @@ def main():
         print(f"Processing file {i+1}/{len(root_files)}: {root_file}")
         data_io = DataIO(root_file, treename)
         plotter = Plotter(data_io)
+        # Reuse histograms filled by earlier runs while analysis.root is unchanged
+        plotter.use_hist_cache()
         plotter.load_table("analysis/yorgo/tables/xQ2ZMh_binning_table.csv")
         # Extract filename for plot title
         filename = Path(root_file).parent.name
@@ -32,9 +34,8 @@ def main():
             (plotter.plot_th1f, {'bin_name': 'ThetaCOM'}),
         ], ncols=3, suptitle=suptitle)
 
-        # Loop over all x-Q2 bins in the table
-        for i in range(100):
-            plotter.plot_bin_from_table(i*100)
+        # Render one bin per x-Q2 cell of the table, spread over all cores
+        plotter.render_bins([i*100 for i in range(100)])
 
         # Make a gif from the x-Q2 bin plots
         plotter.make_bin_plots_gif()
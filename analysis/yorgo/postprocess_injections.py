@@ -17,6 +17,9 @@ def main():
         if "X,Q,Z,Mh" not in DIRECTORY:
             processor.plot_bins()
             processor.plot_asymmetry()
+        else:
+            # Too many bins for per-bin pages to be useful; draw one heatmap of the pulls
+            processor.plot_bins(summary='pull')
         processor.save_to_csv()
 
 if __name__ == "__main__":
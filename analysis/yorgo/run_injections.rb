@@ -9,6 +9,9 @@ include InjectionWorkflow
 # Environment setup
 ENV['LD_LIBRARY_PATH'] = "#{ENV['HOME']}/.local/lib64:#{ENV['LD_LIBRARY_PATH']}"
 
+# Local tasks that failed, across all studies below
+failed = []
+
 # Configuration Parameters
 # For the eHe3 dihadron injections
 config = {
@@ -28,7 +31,7 @@ config = {
   bins_per_slurm_job: 1
 }
 
-run_injection_workflow(config)
+failed += run_injection_workflow(config)
 
 # Configuration Parameters
 # For the ep dihadron injections <EARLY SCIENCE>
@@ -49,7 +52,7 @@ config = {
   bins_per_slurm_job: 1
 }
 
-run_injection_workflow(config)
+failed += run_injection_workflow(config)
 
 # For the ep dihadron injections <FULL>
 config = {
@@ -69,7 +72,7 @@ config = {
   bins_per_slurm_job: 1
 }
 
-run_injection_workflow(config)
+failed += run_injection_workflow(config)
 
 # Configuration Parameters
 # For the 4d ep dihadron injections
@@ -90,4 +93,10 @@ config = {
   bins_per_slurm_job: 100
 }
 
-run_injection_workflow(config)
+failed += run_injection_workflow(config)
+
+# Exit non-zero when local tasks failed, so scripted runs notice
+unless failed.empty?
+  warn "#{failed.size} injection tasks failed: #{failed.map { |task| task[:name] }.join(', ')}"
+  exit 1
+end
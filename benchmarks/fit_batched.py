@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# Benchmark of the batched asymmetry fits in src/asymfit.py against fitting one
+# pseudo-experiment at a time. Generates synthetic bins with a power-law spread of
+# event counts (like the 4D tables), fits every replica of every bin both ways,
+# checks that the results agree and prints the wall time and speed-up.
+#
+#   python3 benchmarks/fit_batched.py [--bins 2000] [--injections 200] [--events 100000]
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from asymfit import FITTERS
+from injection import BLOCK_SIZE
+
+
+def make_sample(n_bins, n_events, polarization, asymmetry, rng):
+    """Events spread over bins with counts falling by orders of magnitude, and their spin-up probability."""
+    shares = 1.0 / np.arange(1, n_bins + 1) ** 1.5
+    bins = np.sort(rng.choice(n_bins, size=n_events, p=shares / shares.sum()))
+    sin_phi = np.sin(rng.uniform(-np.pi, np.pi, n_events))
+    weights = rng.uniform(0.5, 1.5, n_events)
+    p_up = 0.5 * (1 + polarization * asymmetry * sin_phi)
+    return sin_phi, weights, bins, p_up
+
+
+def spin_blocks(p_up, n_injections, seed):
+    """Spins of n_injections replicas, in blocks of about BLOCK_SIZE elements like InjectionStudy.run."""
+    block = max(1, BLOCK_SIZE // len(p_up))
+    for start in range(0, n_injections, block):
+        rng = np.random.default_rng([seed, start])
+        yield np.where(rng.random((min(block, n_injections - start), len(p_up))) < p_up, 1.0, -1.0)
+
+
+def fit_serial(fit, sin_phi, weights, bins, spins, polarization, n_bins):
+    """Reference: one fit per bin and pseudo-experiment."""
+    extracted = np.full((n_bins, spins.shape[0]), np.nan)
+    errors = np.full_like(extracted, np.nan)
+    offsets = np.searchsorted(bins, np.arange(n_bins + 1))
+    for b in range(n_bins):
+        lo, hi = offsets[b], offsets[b + 1]
+        if hi == lo:
+            continue
+        for i in range(spins.shape[0]):
+            a, e = fit(sin_phi[lo:hi], spins[i:i + 1, lo:hi], weights[lo:hi], polarization)
+            extracted[b, i], errors[b, i] = a[0], e[0]
+    return extracted, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batched and per-replica asymmetry fits.")
+    parser.add_argument("--bins", type=int, default=2000)
+    parser.add_argument("--injections", type=int, default=200)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--serial-injections", type=int, default=10,
+                        help="Replicas fitted one by one; the serial time is scaled to --injections")
+    parser.add_argument("--polarization", type=float, default=0.7)
+    parser.add_argument("--asymmetry", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    sin_phi, weights, bins, p_up = make_sample(args.bins, args.events, args.polarization, args.asymmetry, rng)
+    n_serial = min(args.serial_injections, args.injections)
+    print(f"{args.bins} bins, {args.events} events, {args.injections} injections "
+          f"(serial fits timed on {n_serial} and scaled)")
+    print(f"{'fit':<12}{'batched [s]':>12}{'serial [s]':>12}{'speed-up':>10}{'max |diff|':>12}")
+    for name, fit in FITTERS.items():
+        start = time.perf_counter()
+        extracted = np.concatenate([fit(sin_phi, spins, weights, args.polarization, bins=bins, n_bins=args.bins)[0]
+                                    for spins in spin_blocks(p_up, args.injections, args.seed)], axis=1)
+        batched = time.perf_counter() - start
+
+        spins = np.concatenate(list(spin_blocks(p_up, n_serial, args.seed)))
+        start = time.perf_counter()
+        serial_extracted, _ = fit_serial(fit, sin_phi, weights, bins, spins, args.polarization, args.bins)
+        serial = (time.perf_counter() - start) * args.injections / n_serial
+
+        diff = np.nanmax(np.abs(extracted[:, :n_serial] - serial_extracted))
+        print(f"{name:<12}{batched:>12.2f}{serial:>12.2f}{serial / batched:>9.0f}x{diff:>12.1e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Import-time benchmark for the src/ modules. Each module is imported in a fresh
+# interpreter with `python -X importtime`, the best of several runs is compared
+# with its startup budget, and the script exits non-zero if any budget is exceeded.
+#
+#   python3 benchmarks/import_time.py [--repeat N] [module ...]
+#
+# Heavy dependencies (ROOT, matplotlib, yaml, PIL, uproot) must not appear in the
+# "heavy" column: they are imported on first use, not at module load.
+import argparse
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# Startup budget per module, in milliseconds (cumulative import time, including numpy/pandas)
+BUDGETS_MS = {
+    'dataio': 100,
+    'binning_tables': 300,
+    'binindex': 300,
+    'histfill': 300,
+    'create_table': 300,
+    'plotter': 400,
+    'postprocess': 1000,
+}
+
+# Modules that none of the src/ modules should import at load time
+HEAVY = ('ROOT', 'matplotlib', 'yaml', 'PIL', 'uproot')
+
+# Command-line entry points, timed end to end (usage message only)
+CLI_BUDGETS_MS = {
+    'create_table.py': 500,
+    'binning_tables.py': 500,
+}
+
+
+def import_time_ms(module):
+    """Cumulative import time of `module` in a fresh interpreter, and the heavy modules it loaded."""
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=SRC, capture_output=True, text=True, check=True)
+    cumulative = None
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$", line)
+        if match and match.group(2) == module:
+            cumulative = int(match.group(1)) / 1000
+    heavy = [m for m in result.stdout.strip().split(",") if m]
+    return cumulative, heavy
+
+
+def cli_time_ms(script):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, str(SRC / script)], cwd=SRC, capture_output=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the src/ modules against their budgets.")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS_MS))
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module; the fastest counts")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<16}{'best [ms]':>10}{'budget':>10}  heavy")
+    for module in args.modules:
+        runs = [import_time_ms(module) for _ in range(args.repeat)]
+        best = min(ms for ms, _ in runs)
+        heavy = runs[0][1]
+        budget = BUDGETS_MS.get(module)
+        ok = (budget is None or best <= budget) and not heavy
+        failed |= not ok
+        print(f"{module:<16}{best:>10.1f}{budget if budget is not None else '-':>10}  "
+              f"{','.join(heavy) or '-'}{'' if ok else '  <-- over budget'}")
+
+    for script, budget in CLI_BUDGETS_MS.items():
+        best = min(cli_time_ms(script) for _ in range(args.repeat))
+        ok = best <= budget
+        failed |= not ok
+        print(f"{script:<16}{best:>10.1f}{budget:>10}  {'' if ok else '<-- over budget'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
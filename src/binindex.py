@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# Row-sorted event index of a tree for a binning table (see BinIndex). Run as a script
+# to count the events of every bin of a grid, e.g. as job costs for the injection workflow:
+#   python3 src/binindex.py <file.root> <tree> <table.csv> [grid] [--output counts.csv]
+import argparse
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+
+# Table variables that are not stored under their branch name.
+# Binning tables store Q = sqrt(Q2), while the trees store Q2.
+TABLE_BRANCHES = {'Q': ('Q2', np.sqrt)}
+
+
+def table_variables(table_df):
+    """
+    Return the binning variables of a table, in column order (e.g. ['X', 'Q', 'Z', 'Mh']).
+    """
+    variables = []
+    for col in table_df.columns:
+        if col.endswith('_min') and col[:-4] not in variables:
+            variables.append(col[:-4])
+    return variables
+
+
+def variable_branch(variable):
+    """Return the tree branch that a table variable is computed from."""
+    return TABLE_BRANCHES.get(variable, (variable, None))[0]
+
+
+def table_values(variable, chunk):
+    """Return the values of a table variable (in table units) for a chunk of branches."""
+    branch, transform = TABLE_BRANCHES.get(variable, (variable, None))
+    values = chunk[branch]
+    return transform(values) if transform is not None else values
+
+
+class RowAssigner:
+    """
+    Vectorized assignment of events to the rows of a hierarchical binning table.
+
+    The table is read level by level (X, then Q inside each X bin, and so on). At every
+    level the child intervals of each parent cell are sorted, and an event is located
+    with a single np.searchsorted on an integer (parent, rank-of-lower-edge) key, so the
+    cost per level is O(n_events log n_cells) regardless of the table size.
+    Intervals are half-open, [min, max), like the cuts used to build the tables.
+    """
+    def __init__(self, table_df, variables=None):
+        self.variables = variables or table_variables(table_df)
+        if not self.variables:
+            raise ValueError("Table has no <var>_min/<var>_max columns.")
+        self.n_rows = len(table_df)
+
+        self.levels = []
+        parent_of_row = np.zeros(self.n_rows, dtype=np.int64)
+        for var in self.variables:
+            lows = table_df[f"{var}_min"].to_numpy(dtype=float)
+            highs = table_df[f"{var}_max"].to_numpy(dtype=float)
+            cells, child_of_row = np.unique(
+                np.column_stack([parent_of_row, lows, highs]), axis=0, return_inverse=True)
+            child_of_row = child_of_row.reshape(-1)
+            cell_parent = cells[:, 0].astype(np.int64)
+            cell_low = cells[:, 1]
+            cell_high = cells[:, 2]
+            low_values = np.unique(cell_low)
+            stride = len(low_values) + 1
+            cell_keys = cell_parent * stride + np.searchsorted(low_values, cell_low)
+            self.levels.append({
+                'low_values': low_values,
+                'stride': stride,
+                'keys': cell_keys,
+                'parent': cell_parent,
+                'low': cell_low,
+                'high': cell_high,
+            })
+            parent_of_row = child_of_row
+
+        # Leaf cells map back to table rows
+        self.row_of_leaf = np.full(len(self.levels[-1]['keys']), -1, dtype=np.int64)
+        self.row_of_leaf[parent_of_row] = np.arange(self.n_rows)
+
+    def is_partition(self):
+        """
+        Return True if no two rows overlap, i.e. every event belongs to at most one row.
+
+        This holds for a table cut level by level (X, then Q inside each X bin, ...) and for
+        the grids that follow that order from the start (X or X,Q of an X,Q,Z,Mh table). A
+        grid like Q alone takes Q intervals from different X bins, which overlap.
+        """
+        for level in self.levels:
+            # Cells are sorted by (parent, low): siblings must not overlap their successor
+            same_parent = level['parent'][1:] == level['parent'][:-1]
+            if np.any(same_parent & (level['high'][:-1] > level['low'][1:])):
+                return False
+        return True
+
+    def assign(self, values):
+        """
+        Assign events to table rows.
+
+        :param values: dict mapping table variable -> np.ndarray (in table units, e.g. Q not Q2)
+        :return: np.ndarray of table row indices, -1 for events outside every bin
+        """
+        n = len(values[self.variables[0]])
+        parent = np.zeros(n, dtype=np.int64)
+        valid = np.ones(n, dtype=bool)
+        for var, level in zip(self.variables, self.levels):
+            v = np.asarray(values[var], dtype=float)
+            rank = np.searchsorted(level['low_values'], v, side='right') - 1
+            keys = parent * level['stride'] + rank
+            cell = np.searchsorted(level['keys'], keys, side='right') - 1
+            cell = np.clip(cell, 0, None)
+            valid &= (rank >= 0) & (level['parent'][cell] == parent)
+            valid &= (v >= level['low'][cell]) & (v < level['high'][cell])
+            parent = cell
+        rows = self.row_of_leaf[parent]
+        rows[~valid] = -1
+        return rows
+
+
+class GridAssigner:
+    """
+    Assignment of events to the bins of a grid, given as a table with one row per bin.
+
+    When the bins do not overlap (RowAssigner.is_partition) every event belongs to at most
+    one bin and RowAssigner finds it. Otherwise an event can belong to several bins, and it
+    is assigned to each of them, with a [min, max) interval test per bin like cutting the
+    tree once per bin. The events are sorted on the first variable once per chunk, so each
+    bin only tests the events inside its first interval.
+
+    With closed=True the intervals are [min, max], like the TTree::Draw cuts of the
+    Plotter. Neighbouring bins then share their edges, so the per-bin test is always used.
+    """
+    def __init__(self, grid_df, closed=False):
+        self.rows = RowAssigner(grid_df)
+        self.variables = self.rows.variables
+        self.n_rows = self.rows.n_rows
+        self.closed = closed
+        self.overlapping = closed or not self.rows.is_partition()
+        self.lows = np.column_stack([grid_df[f"{v}_min"].to_numpy(dtype=float) for v in self.variables])
+        self.highs = np.column_stack([grid_df[f"{v}_max"].to_numpy(dtype=float) for v in self.variables])
+
+    def assign(self, values, first_row=0, last_row=None):
+        """
+        Assign events to bins.
+
+        :param values: dict mapping table variable -> np.ndarray (in table units, e.g. Q not Q2)
+        :param first_row: Only assign to rows first_row..last_row (inclusive)
+        :param last_row: Last row to assign to (default: the last one)
+        :return: (events, rows): the k-th assignment puts event events[k] in row rows[k];
+            events outside every bin do not appear, and with overlapping bins an event can
+            appear several times. The events of every row are in tree order.
+        """
+        last_row = self.n_rows - 1 if last_row is None else last_row
+        if not self.overlapping:
+            rows = self.rows.assign(values)
+            events = np.flatnonzero((rows >= first_row) & (rows <= last_row))
+            return events, rows[events]
+
+        events, rows = [], []
+        for row, candidates, keep in self._overlapping_masks(values, first_row, last_row):
+            events.append(np.sort(candidates[keep]))
+            rows.append(np.full(len(events[-1]), row, dtype=np.int64))
+        if not events:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(events), np.concatenate(rows)
+
+    def count(self, values):
+        """Number of events in every row, without listing the assignments."""
+        if not self.overlapping:
+            rows = self.rows.assign(values)
+            return np.bincount(rows[rows >= 0], minlength=self.n_rows)
+        counts = np.zeros(self.n_rows, dtype=np.int64)
+        for row, _, keep in self._overlapping_masks(values, 0, self.n_rows - 1):
+            counts[row] = np.count_nonzero(keep)
+        return counts
+
+    def _overlapping_masks(self, values, first_row, last_row):
+        # Yields (row, candidate events, mask of the candidates inside the row)
+        columns = [np.asarray(values[v], dtype=float) for v in self.variables]
+        order = np.argsort(columns[0], kind='stable')
+        first = columns[0][order]
+        starts = np.searchsorted(first, self.lows[:, 0], side='left')
+        stops = np.searchsorted(first, self.highs[:, 0], side='right' if self.closed else 'left')
+        below = np.less_equal if self.closed else np.less
+        for row in range(first_row, last_row + 1):
+            candidates = order[starts[row]:stops[row]]
+            keep = np.ones(len(candidates), dtype=bool)
+            for j in range(1, len(columns)):
+                v = columns[j][candidates]
+                keep &= (v >= self.lows[row, j]) & below(v, self.highs[row, j])
+            yield row, candidates, keep
+
+
+def count_events(data_io, grid_df):
+    """
+    Number of events of the tree in every bin of a grid (one row per bin), in one chunked pass.
+    """
+    assigner = GridAssigner(grid_df)
+    branches = {variable_branch(v) for v in assigner.variables}
+    counts = np.zeros(assigner.n_rows, dtype=np.int64)
+    for chunk in data_io.iterate(branches):
+        counts += assigner.count({v: table_values(v, chunk) for v in assigner.variables})
+    return counts
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return {'path': str(Path(path).resolve()), 'mtime': stat.st_mtime, 'size': stat.st_size}
+
+
+class BinIndex:
+    """
+    Events of a tree sorted by their binning-table row, cached on disk.
+
+    The index lives in a directory next to the ROOT file(s), holding one .npy per stored
+    branch (memory-mapped on load), the per-row offsets and a meta.json describing the
+    inputs. The events of table row r are entries offsets[r]:offsets[r+1] of every column.
+    """
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with open(self.directory / "meta.json") as f:
+            self.meta = json.load(f)
+        self.offsets = np.load(self.directory / "offsets.npy")
+        self.branches = self.meta['branches']
+        self._columns = {}
+
+    @staticmethod
+    def default_directory(data_io, table_path, tag=None):
+        """Directory of the index of a file and table; `tag` tells apart indices of the same table (e.g. a grid)."""
+        stem = Path(table_path).stem if tag is None else f"{Path(table_path).stem}.{tag}"
+        return data_io.get_output_dir() / f"{data_io.name}.{stem}.binindex"
+
+    @classmethod
+    def build(cls, data_io, table_df, table_path, branches=None, directory=None, closed=False):
+        """
+        Build the index with two chunked passes over the tree.
+
+        The first pass counts events per row, the second writes every stored branch into
+        memory-mapped .npy files at the row's offset, so memory stays bounded by the chunk
+        size. If rows overlap (see GridAssigner), an event is stored in each of its rows.
+
+        The files are written to a temporary sibling directory that then replaces
+        `directory`, so readers (other jobs sharing the index, or processes that have
+        memory-mapped the old files) never see a partly written index.
+
+        :param data_io: DataIO of the input tree
+        :param table_df: Binning table as a DataFrame
+        :param table_path: Path of the table (recorded to detect stale indices)
+        :param branches: Branches to store; defaults to the table variables plus Weight
+        :param directory: Output directory; defaults to BinIndex.default_directory
+        :param closed: Use closed [min, max] intervals instead of [min, max) (see GridAssigner)
+        """
+        directory = Path(directory or cls.default_directory(data_io, table_path))
+        assigner = GridAssigner(table_df, closed=closed)
+        var_branches = sorted({variable_branch(v) for v in assigner.variables})
+        if branches is None:
+            branches = var_branches + ['Weight']
+        branches = list(dict.fromkeys(branches))
+        read_branches = set(branches) | set(var_branches)
+
+        # Pass 1: count events per row
+        counts = np.zeros(assigner.n_rows, dtype=np.int64)
+        n_events = 0
+        for chunk in data_io.iterate(var_branches):
+            n_events += len(next(iter(chunk.values())))
+            counts += assigner.count({v: table_values(v, chunk) for v in assigner.variables})
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        # Pass 2: scatter each chunk into its rows
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        building = cls._sibling(directory, "tmp")
+        try:
+            cls._write(building, data_io, assigner, branches, read_branches, offsets, n_events, table_path, closed)
+            cls._replace(building, directory)
+        except BaseException:
+            shutil.rmtree(building, ignore_errors=True)
+            raise
+        print(f"[INFO] Bin index: {int(offsets[-1])} assignments of {n_events} events to {assigner.n_rows} rows"
+              f"{' (overlapping)' if assigner.overlapping else ''}, saved to {directory}")
+        return cls(directory)
+
+    @staticmethod
+    def _write(directory, data_io, assigner, branches, read_branches, offsets, n_events, table_path, closed):
+        columns = {}
+        cursor = offsets[:-1].copy()
+        entry_start = 0
+        for chunk in data_io.iterate(read_branches):
+            events, rows = assigner.assign({v: table_values(v, chunk) for v in assigner.variables})
+            n_chunk = len(next(iter(chunk.values())))
+            entries = np.arange(entry_start, entry_start + n_chunk)
+            entry_start += n_chunk
+            # Sort by row, keeping the tree order of the events inside every row
+            order = np.lexsort((events, rows))
+            sorted_rows = rows[order]
+            events = events[order]
+            first = np.searchsorted(sorted_rows, sorted_rows, side='left')
+            positions = cursor[sorted_rows] + (np.arange(len(order)) - first)
+            cursor += np.bincount(sorted_rows, minlength=assigner.n_rows)
+
+            chunk['entry'] = entries
+            for branch in branches + ['entry']:
+                if branch not in columns:
+                    columns[branch] = np.lib.format.open_memmap(
+                        directory / f"{branch}.npy", mode='w+',
+                        dtype=chunk[branch].dtype, shape=(int(offsets[-1]),))
+                columns[branch][positions] = chunk[branch][events]
+        for column in columns.values():
+            column.flush()
+
+        np.save(directory / "offsets.npy", offsets)
+        meta = {
+            'source': data_io.stamp(),
+            'treename': data_io.treename,
+            'table': _file_stamp(table_path),
+            'variables': assigner.variables,
+            'closed': closed,
+            'branches': branches + ['entry'],
+            'n_rows': assigner.n_rows,
+            'n_events': int(n_events),
+            'n_binned': int(offsets[-1]),
+        }
+        with open(directory / "meta.json", 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @staticmethod
+    def _sibling(directory, suffix):
+        # Unique directory next to `directory` (mkdir, so it gets the umask permissions of the index)
+        path = directory.with_name(f"{directory.name}.{uuid.uuid4().hex[:12]}.{suffix}")
+        path.mkdir()
+        return path
+
+    @classmethod
+    def _replace(cls, building, directory):
+        # A directory cannot be renamed over a non-empty one: move the old index aside first.
+        # Its files are unlinked, not truncated, so existing memory maps stay valid.
+        old = None
+        if directory.exists():
+            old = cls._sibling(directory, "old")
+            try:
+                os.replace(directory, old / directory.name)
+            except FileNotFoundError:
+                pass  # another process moved it first
+        try:
+            os.replace(building, directory)
+        except OSError:
+            # Another process built the same index concurrently and placed it first: keep theirs
+            if not (directory / "meta.json").exists():
+                raise
+            shutil.rmtree(building, ignore_errors=True)
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load_or_build(cls, data_io, table_df, table_path, branches=None, directory=None, rebuild=False,
+                      closed=False):
+        """
+        Load a cached index if it matches the ROOT file, table and branches, otherwise build it.
+        """
+        directory = Path(directory or cls.default_directory(data_io, table_path))
+        if not rebuild and (directory / "meta.json").exists():
+            index = cls(directory)
+            if index.is_current(data_io, table_path, branches, closed=closed):
+                print(f"[INFO] Loaded bin index from {directory}")
+                return index
+        return cls.build(data_io, table_df, table_path, branches=branches, directory=directory, closed=closed)
+
+    def is_current(self, data_io, table_path, branches=None, closed=False):
+        """Return True if the index was built from the same (unchanged) file, tree and table."""
+        if self.meta['source'] != data_io.stamp() or self.meta['treename'] != data_io.treename:
+            return False
+        if self.meta['table'] != _file_stamp(table_path) or self.meta.get('closed', False) != closed:
+            return False
+        return branches is None or set(branches) <= set(self.branches)
+
+    @property
+    def counts(self):
+        """Number of events in each table row."""
+        return np.diff(self.offsets)
+
+    def column(self, branch):
+        """Memory-mapped, row-sorted values of one stored branch."""
+        if branch not in self._columns:
+            if branch not in self.branches:
+                raise KeyError(f"Branch '{branch}' is not stored in the bin index at {self.directory}")
+            self._columns[branch] = np.load(self.directory / f"{branch}.npy", mmap_mode='r')
+        return self._columns[branch]
+
+    def events(self, rows, branches):
+        """
+        Gather the stored branches for the events of the given table rows.
+
+        :param rows: Iterable of table row indices
+        :param branches: Branch names to return
+        :return: dict mapping branch name -> np.ndarray
+        """
+        rows = np.sort(np.asarray(list(rows), dtype=np.int64))
+        # Merge consecutive rows into contiguous slices
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        slices = [(self.offsets[run[0]], self.offsets[run[-1] + 1]) for run in np.split(rows, breaks) if len(run)]
+        return {
+            branch: np.concatenate([self.column(branch)[lo:hi] for lo, hi in slices]) if slices
+            else np.empty(0, dtype=self.column(branch).dtype)
+            for branch in branches
+        }
+
+
+def main():
+    from dataio import DataIO
+    from binning_tables import load_table
+
+    parser = argparse.ArgumentParser(description="Count the events of every bin of a grid.")
+    parser.add_argument("file", help="ROOT file, glob or comma separated list")
+    parser.add_argument("tree")
+    parser.add_argument("table")
+    parser.add_argument("grid", nargs="?", default=None, help="Grid variables (default: every table variable)")
+    parser.add_argument("--output", default=None, help="CSV of bin_index,events (default: print a summary only)")
+    args = parser.parse_args()
+
+    data_io = DataIO(args.file.split(",") if "," in args.file else args.file, args.tree)
+    table = load_table(args.table)
+    counts = count_events(data_io, table.grid_table(args.grid or ",".join(table.variables)))
+    print(f"[INFO] {len(counts)} bins, {counts.sum()} events, {np.count_nonzero(counts == 0)} empty, "
+          f"largest {counts.max() if len(counts) else 0}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write("bin_index,events\n")
+            f.writelines(f"{b},{n}\n" for b, n in enumerate(counts))
+        print(f"[INFO] Saved bin counts to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# Shared storage for binning tables. A CSV/Parquet table is converted once into a
+# `<stem>.bundle/` directory next to it (one .npy per column plus schema.json) and
+# memory-mapped on later loads. Run as a script to pre-build the bundle and the
+# unique-bin keys of some grids:  python3 src/binning_tables.py <table.csv> [grid ...]
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+SCHEMA_VERSION = 1
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return {'path': str(Path(path).resolve()), 'mtime': stat.st_mtime, 'size': stat.st_size}
+
+
+def bundle_path(source):
+    """Bundle directory used to cache a CSV/Parquet table."""
+    source = Path(source)
+    return source.with_name(f"{source.stem}.bundle")
+
+
+def save_table(df, path):
+    """
+    Save a binning table as CSV or Parquet, chosen by the file extension.
+
+    Parquet output needs pyarrow (or fastparquet) installed.
+    """
+    if str(path).endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    print(f"Saved table with {len(df)} rows to: {path}")
+
+
+class BinningTable:
+    """
+    A binning table stored as a memory-mapped .npy bundle.
+
+    Columns are loaded lazily with mmap_mode='r'. unique_bins(grid) returns the distinct
+    (<var>_min, <var>_max, ...) keys of a grid in order of first appearance, which is how
+    the injection workflow numbers bins.
+    """
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with open(self.directory / "schema.json") as f:
+            self.schema = json.load(f)
+        self.columns = list(self.schema['columns'])
+        self.n_rows = self.schema['n_rows']
+        self._columns = {}
+
+    @classmethod
+    def from_dataframe(cls, df, directory, source=None):
+        """Write a DataFrame as a bundle and return it."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for old in directory.glob("*.npy"):
+            old.unlink()
+        columns = {}
+        for col in df.columns:
+            values = df[col].to_numpy()
+            np.save(directory / f"{col}.npy", values)
+            columns[col] = values.dtype.str
+        schema = {
+            'version': SCHEMA_VERSION,
+            'source': _file_stamp(source) if source else None,
+            'columns': columns,
+            'n_rows': len(df),
+            'unique_bins': {},
+        }
+        with open(directory / "schema.json", 'w') as f:
+            json.dump(schema, f, indent=2)
+        return cls(directory)
+
+    def is_current(self, source):
+        """Return True if the bundle was converted from the unchanged `source` file."""
+        return self.schema.get('version') == SCHEMA_VERSION and self.schema.get('source') == _file_stamp(source)
+
+    def __len__(self):
+        return self.n_rows
+
+    def column(self, name):
+        """Zero-copy (memory-mapped) view of one column."""
+        if name not in self._columns:
+            if name not in self.columns:
+                raise KeyError(f"Column '{name}' not in table {self.directory}")
+            self._columns[name] = np.load(self.directory / f"{name}.npy", mmap_mode='r')
+        return self._columns[name]
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    @property
+    def variables(self):
+        """Binning variables in column order (e.g. ['X', 'Q', 'Z', 'Mh'])."""
+        variables = []
+        for col in self.columns:
+            if col.endswith('_min') and col[:-4] not in variables:
+                variables.append(col[:-4])
+        return variables
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame({col: np.asarray(self.column(col)) for col in self.columns})
+
+    def unique_bins(self, grid):
+        """
+        Unique bin keys of a grid, in order of first appearance.
+
+        :param grid: List of variables or a comma separated string (e.g. "X,Q,Z,Mh").
+            Variables without columns in the table count as 0, like in the Ruby workflow.
+        :return: (keys, bin_of_row): keys is (n_bins, 2*len(grid)) with min/max per
+            variable, bin_of_row maps every table row to its bin number
+        """
+        grid = [g.strip() for g in grid.split(",")] if isinstance(grid, str) else list(grid)
+        name = ",".join(grid)
+        keys_path = self.directory / f"grid_{name}_keys.npy"
+        rows_path = self.directory / f"grid_{name}_rows.npy"
+        if keys_path.exists() and rows_path.exists():
+            return np.load(keys_path, mmap_mode='r'), np.load(rows_path, mmap_mode='r')
+
+        cols = []
+        for g in grid:
+            for end in ("min", "max"):
+                col = f"{g}_{end}"
+                cols.append(np.asarray(self.column(col), dtype=float) if col in self.columns else np.zeros(self.n_rows))
+        matrix = np.column_stack(cols) if cols else np.zeros((self.n_rows, 0))
+        _, first, inverse = np.unique(matrix, axis=0, return_index=True, return_inverse=True)
+        # np.unique sorts; renumber bins by first appearance
+        order = np.argsort(first, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        keys = matrix[first[order]]
+        bin_of_row = rank[inverse.reshape(-1)]
+
+        np.save(keys_path, keys)
+        np.save(rows_path, bin_of_row)
+        self.schema['unique_bins'][name] = int(len(keys))
+        with open(self.directory / "schema.json", 'w') as f:
+            json.dump(self.schema, f, indent=2)
+        return keys, bin_of_row
+
+    def grid_table(self, grid):
+        """
+        Bins of a grid as a DataFrame: one row per bin, numbered like unique_bins, with the
+        <var>_min/<var>_max columns of the grid variables that the table has.
+        """
+        import pandas as pd
+        grid = [g.strip() for g in grid.split(",")] if isinstance(grid, str) else list(grid)
+        keys, _ = self.unique_bins(grid)
+        data = {}
+        for i, g in enumerate(grid):
+            if f"{g}_min" in self.columns:
+                data[f"{g}_min"] = np.asarray(keys[:, 2 * i], dtype=float)
+                data[f"{g}_max"] = np.asarray(keys[:, 2 * i + 1], dtype=float)
+        return pd.DataFrame(data)
+
+
+def load_table(path, rebuild=False):
+    """
+    Load a binning table, converting CSV/Parquet to a cached bundle on first use.
+
+    :param path: A .csv or .parquet table, or a bundle directory
+    :param rebuild: Reconvert even if a current bundle exists
+    :return: BinningTable
+    """
+    path = Path(path)
+    if path.is_dir():
+        return BinningTable(path)
+    if not path.is_file():
+        raise FileNotFoundError(f"Table file '{path}' not found.")
+
+    directory = bundle_path(path)
+    if not rebuild and (directory / "schema.json").exists():
+        table = BinningTable(directory)
+        if table.is_current(path):
+            return table
+
+    import pandas as pd
+    if path.suffix == ".parquet":
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    print(f"[INFO] Converting table '{path}' to {directory}")
+    return BinningTable.from_dataframe(df, directory, source=path)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 src/binning_tables.py <table.csv> [grid ...]")
+        sys.exit(1)
+    table = load_table(sys.argv[1])
+    print(f"Table '{sys.argv[1]}': {len(table)} rows, variables {table.variables}")
+    for grid in sys.argv[2:]:
+        keys, _ = table.unique_bins(grid)
+        print(f"Grid {grid}: {len(keys)} unique bins")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 #!/usr/bin/env python3
 import sys
 import numpy as np
-import pandas as pd
-import itertools
+from binning_tables import save_table
 
 
 def main():
@@ -22,19 +21,29 @@ def main():
 
 
 
+# Table columns that are not named after the binned branch.
+# Binning tables store Q = sqrt(Q2) rather than Q2.
+TABLE_COLUMNS = {'Q2': ('Q', np.sqrt)}
+
+
 def generate_table(list_of_bin_edges, list_of_bin_names, aut_value):
     """
     Generate a pandas DataFrame with binning information.
-    
+
+    Every combination of bins is one row; the last dimension varies fastest. Columns are
+    built directly from broadcasted edge arrays, so dense multi-dimensional grids cost
+    a few NumPy operations rather than one dict per bin.
+
     Args:
         list_of_bin_edges: List of arrays, each containing bin edges for a dimension
-        list_of_bin_names: List of dimension names ('X', 'Q2', 'Z', 'PhPerp')
+        list_of_bin_names: List of dimension names ('X', 'Q2', 'Q', 'Z', 'Mh', 'PhPerp').
+            'Q2' edges are stored as Q = sqrt(Q2), like the hierarchical tables.
         aut_value: AUT value to assign
     
     Returns:
         pd.DataFrame: DataFrame with binning information
     """
-    global_bin_names = ['X', 'Q2', 'Z', 'PhPerp']
+    global_bin_names = ['X', 'Q2', 'Q', 'Z', 'Mh', 'PhPerp']
     
     if len(list_of_bin_edges) != len(list_of_bin_names):
         print("Error: Length of bin edges and bin names must be the same")
@@ -44,53 +53,31 @@ def generate_table(list_of_bin_edges, list_of_bin_names, aut_value):
         if name not in global_bin_names:
             print(f"Error: Bin name '{name}' is not allowed")
             return None
-    
-    # Create all combinations of bin indices
-    bin_indices = [range(len(edges) - 1) for edges in list_of_bin_edges]
-    combinations = list(itertools.product(*bin_indices))
-    
-    # Calculate total number of bins
-    total_bins = len(combinations)
-
-    # Create DataFrame
-    data = []
-    for combo in combinations:
-        row = {
-            'itar': 1,
-            'ihad': 1,
-            'X_min': 0,
-            'X_max': 9999,
-            'Q_min': 0,
-            'Q_max': 9999,
-            'Z_min': 0,
-            'Z_max': 9999,
-            'Mh_min': 0,
-            'Mh_max': 9999,
-            'AUT': aut_value
-        }
-        
-        # Set the actual bin values for provided dimensions
-        for i, name in enumerate(list_of_bin_names):
-            bin_idx = combo[i]
-            edges = list_of_bin_edges[i]
-            if name == 'X':
-                row['X_min'] = edges[bin_idx]
-                row['X_max'] = edges[bin_idx + 1]
-            elif name == 'Q2':
-                row['Q_min'] = edges[bin_idx]
-                row['Q_max'] = edges[bin_idx + 1]
-            elif name == 'Z':
-                row['Z_min'] = edges[bin_idx]
-                row['Z_max'] = edges[bin_idx + 1]
-            elif name == 'Mh':
-                row['Mh_min'] = edges[bin_idx]
-                row['Mh_max'] = edges[bin_idx + 1]
-
-        data.append(row)
-    
-    df = pd.DataFrame(data)
+
+    # Bin index of every dimension for every row (itertools.product order)
+    list_of_bin_edges = [np.asarray(edges, dtype=float) for edges in list_of_bin_edges]
+    grids = np.meshgrid(*[np.arange(len(edges) - 1) for edges in list_of_bin_edges], indexing='ij')
+    bin_indices = [grid.ravel() for grid in grids]
+    total_bins = bin_indices[0].size if bin_indices else 0
+
+    # Defaults for dimensions that are not binned; PhPerp columns only appear when binned
+    columns = {'itar': np.ones(total_bins, dtype=int), 'ihad': np.ones(total_bins, dtype=int)}
+    for col in ['X', 'Q', 'Z', 'Mh']:
+        columns[f"{col}_min"] = np.zeros(total_bins, dtype=int)
+        columns[f"{col}_max"] = np.full(total_bins, 9999)
+
+    # Set the actual bin values for provided dimensions
+    for name, edges, idx in zip(list_of_bin_names, list_of_bin_edges, bin_indices):
+        col, transform = TABLE_COLUMNS.get(name, (name, None))
+        if transform is not None:
+            edges = transform(edges)
+        columns[f"{col}_min"] = edges[idx]
+        columns[f"{col}_max"] = edges[idx + 1]
+    columns['AUT'] = np.full(total_bins, aut_value)
+
+    import pandas as pd
+    df = pd.DataFrame(columns)
     return df
-    
 
 
 def yorgo_x_table():
@@ -126,10 +113,327 @@ def yorgo_x_table():
     if df is not None:
         print("Generated Yorgo X table:")
         print(df)
-        df.to_csv("analysis/yorgo/tables/x_binning_table.csv", index=False)
+        save_table(df, "analysis/yorgo/tables/x_binning_table.csv")
+
+
+def hierarchical_weighted_bins(values, weights, n_bins, block_size=1 << 20):
+    """
+    N-dimensional adaptive binning with roughly equal weight per bin.
+
+    The first dimension is split into n_bins[0] bins of equal total weight, then every
+    bin of the first dimension is split independently along the second dimension, and
+    so on. Each level sorts the surviving events once by (parent bin, value) and finds
+    all edges of all parent bins with a single searchsorted on the global cumulative
+    weight, so the cost is a handful of O(N log N) passes regardless of the bin count.
+
+    Bins are half-open [low, high) as in weighted_equal_bins; events equal to the upper
+    edge of the last bin are dropped from deeper levels. Empty bins above the last level
+    are not split further, while every last-level bin of a populated parent is emitted.
 
+    Args:
+        values: list of 1D arrays, one per dimension, in nesting order
+        weights: 1D array of non-negative event weights
+        n_bins: list with the number of bins per dimension
+        block_size: number of events compared against their edges at a time
+
+    Returns:
+        dict with
+            'low', 'high': (n_rows, n_dims) arrays of bin edges per row
+            'index': (n_rows, n_dims) array of bin numbers within each parent
+            'weight': (n_rows,) total weight per row
+    """
+    n_dims = len(values)
+    if len(n_bins) != n_dims:
+        raise ValueError("values and n_bins must have the same length")
+    weights = np.asarray(weights, dtype=np.float64)
+    if (weights < 0).any():
+        raise ValueError("hierarchical_weighted_bins requires non-negative weights")
+
+    idx = np.arange(len(weights))
+    group = np.zeros(len(weights), dtype=np.int64)
+    n_groups = 1
+    level_edges = []
+    for d in range(n_dims):
+        n = n_bins[d]
+        v = np.asarray(values[d], dtype=np.float64)[idx]
+        order = np.lexsort((v, group))
+        v, group, idx = v[order], group[order], idx[order]
+        w = weights[idx]
+
+        # Contiguous segment [start, start + count) of every parent bin
+        counts = np.bincount(group, minlength=n_groups)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        filled = np.flatnonzero(counts > 0)
+        first = starts[filled]
+        last = first + counts[filled] - 1
+
+        cumsum = np.cumsum(w)
+        base = np.where(first > 0, cumsum[np.maximum(first - 1, 0)], 0.0)
+        totals = cumsum[last] - base
+
+        edges = np.full((n_groups, n + 1), np.nan)
+        edges[filled, 0] = v[first]
+        edges[filled, n] = v[last]
+        if n > 1:
+            targets = base[:, None] + np.arange(1, n)[None, :] * (totals / n)[:, None]
+            pos = np.searchsorted(cumsum, targets.ravel(), side='left').reshape(targets.shape)
+            pos = np.clip(pos, first[:, None], last[:, None])
+            edges[filled, 1:n] = v[pos]
+        level_edges.append(edges)
+
+        group, keep = _child_groups(v, group, edges, block_size)
+        idx = idx[keep]
+        n_groups *= n
+
+    bin_weights = np.bincount(group, weights=weights[idx], minlength=n_groups)
+    return _emit_rows(level_edges, n_bins, bin_weights)
+
+
+def _child_groups(v, group, edges, block_size=1 << 20):
+    """
+    Move events one level down: child bin = number of interior edges <= value.
 
-def yorgo_xQ2ZMh_table():
+    Returns the child group ids (parent * n + child) of the kept events and the keep
+    mask; events at or above the upper edge of their parent's last bin are dropped.
+    """
+    n = edges.shape[1] - 1
+    child = np.empty(len(v), dtype=np.int64)
+    keep = np.empty(len(v), dtype=bool)
+    for lo in range(0, len(v), block_size):
+        hi = lo + block_size
+        group_edges = edges[group[lo:hi]]
+        child[lo:hi] = (v[lo:hi, None] >= group_edges[:, 1:n]).sum(axis=1)
+        # NaN edges (empty parents) compare False and drop the event
+        keep[lo:hi] = v[lo:hi] < group_edges[:, n]
+    return group[keep] * n + child[keep], keep
+
+
+def _emit_rows(level_edges, n_bins, bin_weights):
+    """Rows: every last-level bin of a populated last-level parent, in nesting order."""
+    n_dims = len(n_bins)
+    n_last = n_bins[-1]
+    parents = np.flatnonzero(~np.isnan(level_edges[-1][:, 0]))
+    rows = (parents[:, None] * n_last + np.arange(n_last)[None, :]).ravel()
+
+    index = np.empty((len(rows), n_dims), dtype=np.int64)
+    low = np.empty((len(rows), n_dims))
+    high = np.empty((len(rows), n_dims))
+    ancestor = rows.copy()
+    for d in range(n_dims - 1, -1, -1):
+        index[:, d] = ancestor % n_bins[d]
+        ancestor //= n_bins[d]
+        low[:, d] = level_edges[d][ancestor, index[:, d]]
+        high[:, d] = level_edges[d][ancestor, index[:, d] + 1]
+    return {'low': low, 'high': high, 'index': index, 'weight': bin_weights[rows]}
+
+
+class GroupedQuantileSketch:
+    """
+    Mergeable weighted quantile sketch for many independent groups at once.
+
+    Each group keeps weighted centroids (mean value, total weight) sorted by value.
+    Compression merges neighbouring centroids so that no merged centroid carries more
+    than `accuracy` times the group's total weight, which bounds the weighted-rank
+    error of any quantile to about `accuracy` and the memory to about 2/accuracy
+    centroids per group, however many events are added. Exact minima, maxima, totals
+    and event counts are tracked alongside.
+    """
+    def __init__(self, n_groups, accuracy=1e-3):
+        self.n_groups = n_groups
+        self.accuracy = accuracy
+        self.group = np.empty(0, dtype=np.int64)
+        self.value = np.empty(0)
+        self.weight = np.empty(0)
+        self.vmin = np.full(n_groups, np.inf)
+        self.vmax = np.full(n_groups, -np.inf)
+        self.total = np.zeros(n_groups)
+        self.count = np.zeros(n_groups, dtype=np.int64)
+
+    def update(self, group, values, weights):
+        """Add events (group id, value, weight)."""
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        np.minimum.at(self.vmin, group, values)
+        np.maximum.at(self.vmax, group, values)
+        self.total += np.bincount(group, weights=weights, minlength=self.n_groups)
+        self.count += np.bincount(group, minlength=self.n_groups)
+        self._compress(np.concatenate([self.group, group]),
+                       np.concatenate([self.value, values]),
+                       np.concatenate([self.weight, weights]))
+
+    def merge(self, other):
+        """Merge another sketch with the same groups into this one."""
+        self.vmin = np.minimum(self.vmin, other.vmin)
+        self.vmax = np.maximum(self.vmax, other.vmax)
+        self.total += other.total
+        self.count += other.count
+        self._compress(np.concatenate([self.group, other.group]),
+                       np.concatenate([self.value, other.value]),
+                       np.concatenate([self.weight, other.weight]))
+
+    def _compress(self, group, value, weight):
+        order = np.lexsort((value, group))
+        group, value, weight = group[order], value[order], weight[order]
+        if len(group) == 0:
+            self.group, self.value, self.weight = group, value, weight
+            return
+        # Items of at least half the budget stay alone; smaller items are bucketed by
+        # their cumulative weight in steps of half the budget, so buckets stay below it
+        cap = 0.5 * self.accuracy * self.total[group]
+        cumsum = np.cumsum(weight)
+        first = np.searchsorted(group, group, side='left')
+        before = cumsum - weight - np.where(first > 0, cumsum[np.maximum(first - 1, 0)], 0.0)
+        bucket = np.floor(before / np.where(cap > 0, cap, 1.0)).astype(np.int64)
+        large = weight >= cap
+        new = np.ones(len(group), dtype=bool)
+        new[1:] = (group[1:] != group[:-1]) | (bucket[1:] != bucket[:-1]) | large[1:] | large[:-1]
+        segment = np.cumsum(new) - 1
+
+        seg_weight = np.bincount(segment, weights=weight)
+        seg_sum = np.bincount(segment, weights=weight * value)
+        seg_plain = np.bincount(segment, weights=value) / np.bincount(segment)
+        self.group = group[new]
+        self.weight = seg_weight
+        self.value = np.where(seg_weight > 0, seg_sum / np.where(seg_weight > 0, seg_weight, 1.0), seg_plain)
+
+    def edges(self, n_bins):
+        """
+        Equal-weight bin edges for every group, with the same rule as weighted_equal_bins.
+
+        Returns:
+            tuple: (edges (n_groups, n_bins+1) with NaN rows for empty groups,
+                    worst-case weighted-rank error of the interior edges as a fraction of the group weight)
+        """
+        edges = np.full((self.n_groups, n_bins + 1), np.nan)
+        filled = np.flatnonzero(self.count > 0)
+        edges[filled, 0] = self.vmin[filled]
+        edges[filled, n_bins] = self.vmax[filled]
+        if n_bins < 2 or len(filled) == 0:
+            return edges, 0.0
+
+        cumsum = np.cumsum(self.weight)
+        first = np.searchsorted(self.group, filled, side='left')
+        last = np.searchsorted(self.group, filled, side='right') - 1
+        base = np.where(first > 0, cumsum[np.maximum(first - 1, 0)], 0.0)
+        totals = self.total[filled]
+        targets = base[:, None] + np.arange(1, n_bins)[None, :] * (totals / n_bins)[:, None]
+        pos = np.searchsorted(cumsum, targets.ravel(), side='left').reshape(targets.shape)
+        pos = np.clip(pos, first[:, None], last[:, None])
+        edges[filled, 1:n_bins] = self.value[pos]
+
+        rank_error = self.weight[pos] / np.where(totals > 0, totals, 1.0)[:, None]
+        return edges, float(rank_error.max())
+
+
+def streaming_hierarchical_weighted_bins(make_chunks, names, weight_name, n_bins, accuracy=1e-3):
+    """
+    Out-of-core version of hierarchical_weighted_bins.
+
+    Edges are estimated level by level from GroupedQuantileSketch objects fed chunk by
+    chunk, so memory depends on the chunk size and the accuracy target, not on the
+    number of events. It costs one pass over the data per dimension plus a final pass
+    for the bin weights.
+
+    Args:
+        make_chunks: callable returning a fresh iterator of dicts (branch -> array)
+        names: branch names in nesting order (e.g. ['X', 'Q2', 'Z', 'Mh'])
+        weight_name: name of the weight branch
+        n_bins: list with the number of bins per dimension
+        accuracy: target weighted-rank accuracy of each edge, as a fraction of the parent bin weight
+
+    Returns:
+        dict like hierarchical_weighted_bins, plus 'max_rank_error': the worst-case
+        weighted-rank error of any interior edge reported by the sketches
+    """
+    def descend(chunk, depth):
+        """Group ids of the chunk's events at `depth`, and the indices of the kept events."""
+        idx = np.arange(len(chunk[weight_name]))
+        group = np.zeros(len(idx), dtype=np.int64)
+        for d in range(depth):
+            v = np.asarray(chunk[names[d]], dtype=np.float64)[idx]
+            group, keep = _child_groups(v, group, level_edges[d])
+            idx = idx[keep]
+        return group, idx
+
+    level_edges = []
+    max_rank_error = 0.0
+    n_groups = 1
+    for depth, name in enumerate(names):
+        sketch = GroupedQuantileSketch(n_groups, accuracy=accuracy)
+        for chunk in make_chunks():
+            group, idx = descend(chunk, depth)
+            sketch.update(group, np.asarray(chunk[name])[idx], np.asarray(chunk[weight_name])[idx])
+        edges, rank_error = sketch.edges(n_bins[depth])
+        level_edges.append(edges)
+        max_rank_error = max(max_rank_error, rank_error)
+        print(f"[INFO] {name}: edges for {int((sketch.count > 0).sum())} parent bins, "
+              f"{len(sketch.weight)} centroids, worst-case rank error {rank_error:.2e}")
+        n_groups *= n_bins[depth]
+
+    bin_weights = np.zeros(n_groups)
+    for chunk in make_chunks():
+        group, idx = descend(chunk, len(names))
+        bin_weights += np.bincount(group, weights=np.asarray(chunk[weight_name], dtype=np.float64)[idx],
+                                   minlength=n_groups)
+
+    result = _emit_rows(level_edges, n_bins, bin_weights)
+    result['max_rank_error'] = max_rank_error
+    return result
+
+
+def adaptive_binning_table(columns, weights, n_bins, aut_value=0.1):
+    """
+    Build a binning table with hierarchical_weighted_bins.
+
+    Args:
+        columns: dict mapping branch name -> array, in nesting order (e.g. X, Q2, Z, Mh)
+        weights: array of event weights
+        n_bins: list with the number of bins per branch
+        aut_value: AUT value to assign
+
+    Returns:
+        tuple: (pd.DataFrame table, np.ndarray total weight per row)
+    """
+    names = list(columns)
+    result = hierarchical_weighted_bins([columns[name] for name in names], weights, n_bins)
+    return _result_to_table(names, result, aut_value), result['weight']
+
+
+def _result_to_table(names, result, aut_value):
+    """Convert a hierarchical binning result to the itar/ihad/<var>_min/<var>_max/AUT layout."""
+    n_rows = len(result['weight'])
+
+    table = {'itar': np.ones(n_rows, dtype=int), 'ihad': np.ones(n_rows, dtype=int)}
+    for d, name in enumerate(names):
+        col, transform = TABLE_COLUMNS.get(name, (name, None))
+        low, high = result['low'][:, d], result['high'][:, d]
+        if transform is not None:
+            low, high = transform(low), transform(high)
+        table[f"{col}_min"] = low
+        table[f"{col}_max"] = high
+    table['AUT'] = np.full(n_rows, aut_value)
+
+    import pandas as pd
+    return pd.DataFrame(table)
+
+
+def yorgo_xQ2ZMh_table_streaming():
+    """
+    Same table as yorgo_xQ2ZMh_table, built out-of-core with a fixed memory footprint.
+    """
+    yorgo_xQ2ZMh_table(streaming=True)
+
+
+def yorgo_xQ2ZMh_table(streaming=False, accuracy=1e-3, step_size="200 MB"):
+    """
+    Generate the hierarchical X, Q2, Z, Mh table for Yorgo's analysis.
+
+    Args:
+        streaming: Read the tree in uproot chunks and estimate edges with quantile
+            sketches instead of loading every branch into memory
+        accuracy: Weighted-rank accuracy target of the streaming edges
+        step_size: uproot chunk size for the streaming mode
+    """
     import uproot
     from scipy import stats
 
@@ -140,105 +444,32 @@ def yorgo_xQ2ZMh_table():
     # filename = "out/BeAGLE.eHe3_pipluspiminus___epic.25.08.0_10x166/analysis.root"
     tree_name = "dihadron_tree"
 
-    with uproot.open(filename) as f:
-        tree = f[tree_name]
-        X = tree["X"].array(library="np")
-        Q2 = tree["Q2"].array(library="np")
-        Z = tree["Z"].array(library="np")
-        Mh = tree["Mh"].array(library="np")
-        Weight = tree["Weight"].array(library="np")
-
-    df = pd.DataFrame({
-        "X": X,
-        "Q2": Q2,
-        "Z": Z,
-        "Mh": Mh,
-        "Weight": Weight
-    })
+    names = ["X", "Q2", "Z", "Mh"]
+    N_X, N_Q2, N_Z, N_Mh = 10, 10, 10, 10
 
-    # =====================================================
-    # Helper function: weighted-equal binning
-    # =====================================================
-    def weighted_equal_bins(values, weights, n_bins):
-        """Return bin edges so that total weight per bin is roughly equal."""
-        if len(values) == 0:
-            return None
-        sorter = np.argsort(values)
-        sorted_vals = values[sorter]
-        sorted_weights = weights[sorter]
-        cumsum = np.cumsum(sorted_weights)
-        total = cumsum[-1]
-        targets = np.linspace(0, total, n_bins + 1)
-        edges = [sorted_vals[0]]
-        for tw in targets[1:-1]:
-            idx = np.searchsorted(cumsum, tw)
-            edges.append(sorted_vals[idx])
-        edges.append(sorted_vals[-1])
-        return np.array(edges)
+    if streaming:
+        # =====================================================
+        # Hierarchical adaptive binning, streamed from disk
+        # =====================================================
+        def make_chunks():
+            return uproot.iterate(f"{filename}:{tree_name}", names + ["Weight"],
+                                  step_size=step_size, library="np")
+
+        result = streaming_hierarchical_weighted_bins(make_chunks, names, "Weight",
+                                                      [N_X, N_Q2, N_Z, N_Mh], accuracy=accuracy)
+        df_bins = _result_to_table(names, result, aut_value=0.1)
+        all_bin_weights = result['weight']
+        print(f"Worst-case edge error (fraction of parent bin weight): {result['max_rank_error']:.2e}")
+    else:
+        with uproot.open(filename) as f:
+            tree = f[tree_name]
+            columns = {name: tree[name].array(library="np") for name in names}
+            Weight = tree["Weight"].array(library="np")
 
-    # =====================================================
-    # Hierarchical adaptive binning
-    # =====================================================
-    N_X, N_Q2, N_Z, N_Mh = 10, 10, 10, 10
-    all_bin_weights = []
-    records = []  # for CSV export
-
-    # 1. Top-level X binning
-    X_edges = weighted_equal_bins(df["X"].to_numpy(), df["Weight"].to_numpy(), N_X)
-
-    for iX in range(N_X):
-        X_low, X_high = X_edges[iX], X_edges[iX+1]
-        df_X = df[(df["X"] >= X_low) & (df["X"] < X_high)]
-        if len(df_X) == 0:
-            continue
-
-        # 2. Q² bins inside this X bin
-        Q2_edges = weighted_equal_bins(df_X["Q2"].to_numpy(), df_X["Weight"].to_numpy(), N_Q2)
-        if Q2_edges is None:
-            continue
-
-        for iQ2 in range(N_Q2):
-            Q2_low, Q2_high = Q2_edges[iQ2], Q2_edges[iQ2+1]
-            df_Q2 = df_X[(df_X["Q2"] >= Q2_low) & (df_X["Q2"] < Q2_high)]
-            if len(df_Q2) == 0:
-                continue
-
-            # 3. Z bins inside this (X, Q²) bin
-            Z_edges = weighted_equal_bins(df_Q2["Z"].to_numpy(), df_Q2["Weight"].to_numpy(), N_Z)
-            if Z_edges is None:
-                continue
-
-            for iZ in range(N_Z):
-                Z_low, Z_high = Z_edges[iZ], Z_edges[iZ+1]
-                df_Z = df_Q2[(df_Q2["Z"] >= Z_low) & (df_Q2["Z"] < Z_high)]
-                if len(df_Z) == 0:
-                    continue
-
-                # 4. Mh bins inside this (X, Q², Z) bin
-                Mh_edges = weighted_equal_bins(df_Z["Mh"].to_numpy(), df_Z["Weight"].to_numpy(), N_Mh)
-                if Mh_edges is None:
-                    continue
-
-                for iMh in range(N_Mh):
-                    Mh_low, Mh_high = Mh_edges[iMh], Mh_edges[iMh+1]
-                    df_Mh = df_Z[(df_Z["Mh"] >= Mh_low) & (df_Z["Mh"] < Mh_high)]
-                    total_w = df_Mh["Weight"].sum()
-                    all_bin_weights.append(total_w)
-
-                    # record for CSV
-                    records.append({
-                        "itar": 1,
-                        "ihad": 1,
-                        "X_min": X_low,
-                        "X_max": X_high,
-                        "Q_min": np.sqrt(Q2_low),
-                        "Q_max": np.sqrt(Q2_high),
-                        "Z_min": Z_low,
-                        "Z_max": Z_high,
-                        "Mh_min": Mh_low,
-                        "Mh_max": Mh_high,
-                        "AUT": 0.1
-                    })
+        # =====================================================
+        # Hierarchical adaptive binning
+        # =====================================================
+        df_bins, all_bin_weights = adaptive_binning_table(columns, Weight, [N_X, N_Q2, N_Z, N_Mh], aut_value=0.1)
 
     # =====================================================
     # Summarize total bin weights
@@ -272,7 +503,6 @@ def yorgo_xQ2ZMh_table():
     # Save binning scheme to CSV
     # =====================================================
     output_csv = "analysis/yorgo/tables/xQ2ZMh_binning_table.csv"
-    df_bins = pd.DataFrame(records)
     df_bins.to_csv(output_csv, index=False)
 
     print(f"\nBinning scheme saved to: {output_csv}")
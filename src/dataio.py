@@ -1,12 +1,201 @@
+import glob
+import hashlib
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Files of a chain read at the same time by DataIO.iterate. Each one holds up to three
+# chunks in memory (one being read, two queued), so this bounds the read-ahead memory.
+MAX_PARALLEL_FILES = 4
+
 class DataIO:
-    def __init__(self, filepath, treename):
-        self.filepath = filepath
+    def __init__(self, filepath, treename, backend="root", step_size="100 MB", workers=None):
+        """
+        :param filepath: Path to the ROOT file, a glob pattern (e.g. "out/campaign/job_*/analysis.root"),
+            or a list of paths and patterns. Several files are read as one chain, without hadd.
+        :param treename: Name of the TTree inside the file(s)
+        :param backend: Default histogram backend for Plotter, "root" (TTree::Draw), "uproot" (chunked NumPy)
+            or "rdf" (multithreaded RDataFrame)
+        :param step_size: Chunk size for the uproot backend, as entries (int) or memory ("100 MB")
+        :param workers: Threads used to read the input: uproot basket decompression, or the implicit
+            multithreading of the rdf backend (default: all cores, 1 = serial)
+        """
+        self.filepaths = self.expand(filepath)
+        # A single file keeps its path here; for several files this is the original pattern/list
+        self.filepath = self.filepaths[0] if len(self.filepaths) == 1 else filepath
         self.treename = treename
+        self.backend = backend
+        self.step_size = step_size
+        self.workers = workers
+
+    @staticmethod
+    def expand(filepath):
+        """
+        Expand a path, glob pattern or list of them into a sorted list of files.
+        """
+        patterns = [filepath] if isinstance(filepath, (str, os.PathLike)) else list(filepath)
+        files = []
+        for pattern in patterns:
+            pattern = str(pattern)
+            if glob.has_magic(pattern):
+                matches = sorted(glob.glob(pattern))
+                if not matches:
+                    raise FileNotFoundError(f"No ROOT files match '{pattern}'")
+                files.extend(matches)
+            else:
+                files.append(pattern)
+        if not files:
+            raise ValueError("No input files given.")
+        return files
+
+    @property
+    def is_chain(self):
+        return len(self.filepaths) > 1
+
+    @property
+    def name(self):
+        """Short name for outputs derived from the input, e.g. cache directories."""
+        stem = Path(self.filepaths[0]).stem
+        if not self.is_chain:
+            return stem
+        digest = hashlib.sha1("\n".join(self.filepaths).encode()).hexdigest()[:8]
+        return f"{stem}_{len(self.filepaths)}files_{digest}"
+
+    def stamp(self):
+        """Path, mtime and size of the input file(s), used to detect stale caches."""
+        stamps = []
+        for path in self.filepaths:
+            stat = os.stat(path)
+            stamps.append({'path': str(Path(path).resolve()), 'mtime': stat.st_mtime, 'size': stat.st_size})
+        return stamps[0] if not self.is_chain else {'files': stamps}
 
     def get_file_subdir(self):
-        return Path(self.filepath).parent
+        if not self.is_chain:
+            return Path(self.filepath).parent
+        return Path(os.path.commonpath([str(Path(path).parent.resolve()) for path in self.filepaths]))
 
     def get_output_dir(self):
-        return self.get_file_subdir() 
\ No newline at end of file
+        return self.get_file_subdir()
+
+    def open_tree(self):
+        """
+        Open the tree with PyROOT: a TTree for one file, a TChain over several.
+
+        :return: (owner, tree); keep `owner` (the TFile or the chain) alive while using `tree`
+        """
+        import ROOT
+        if not self.is_chain:
+            file = ROOT.TFile.Open(self.filepath)
+            return file, file.Get(self.treename)
+        chain = ROOT.TChain(self.treename)
+        for path in self.filepaths:
+            chain.Add(path)
+        return chain, chain
+
+    def keys(self):
+        """Branch names of the tree (of the first file for a chain)."""
+        import uproot
+        with uproot.open(self.filepaths[0]) as file:
+            return list(file[self.treename].keys())
+
+    def iterate(self, branches, step_size=None):
+        """
+        Stream the requested branches chunk by chunk with uproot.
+
+        All files are read in order as one sequence of chunks. Baskets are decompressed
+        on a thread pool, and the next chunk is read in the background while the current
+        one is being processed. For several files, up to MAX_PARALLEL_FILES of them are
+        read at the same time, each by its own thread; their chunks are still yielded in
+        file order.
+
+        :param branches: Iterable of branch names to read
+        :param step_size: Override for the chunk size
+        :return: Generator of dicts mapping branch name -> np.ndarray
+        """
+        import uproot
+        files = {path: self.treename for path in self.filepaths}
+        workers = self.workers or os.cpu_count() or 1
+        if workers == 1:
+            yield from uproot.iterate(files, sorted(branches), step_size=step_size or self.step_size, library="np")
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def read(files):
+                return uproot.iterate(files, sorted(branches), step_size=step_size or self.step_size, library="np",
+                                      decompression_executor=executor, interpretation_executor=executor)
+
+            if not self.is_chain:
+                yield from _read_ahead(read(files))
+                return
+            parallel = min(len(self.filepaths), workers, MAX_PARALLEL_FILES)
+            yield from _read_files([{path: self.treename} for path in self.filepaths], read, parallel)
+
+
+def _read_ahead(chunks):
+    """Yield from `chunks`, reading the next item in a background thread while the current one is used."""
+    iterator = iter(chunks)
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        future = reader.submit(next, iterator, None)
+        while True:
+            chunk = future.result()
+            if chunk is None:
+                return
+            future = reader.submit(next, iterator, None)
+            yield chunk
+
+
+_DONE = object()
+
+
+def _read_files(sources, read, parallel):
+    """
+    Yield the chunks of several sources in order, reading up to `parallel` of them at once.
+
+    Every source is read by its own thread into a small queue, so file i+1 is already
+    being decompressed while the chunks of file i are used.
+
+    :param sources: List of arguments for `read`, one per file
+    :param read: Function returning an iterator of chunks for one source
+    :param parallel: Number of sources read at the same time
+    """
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=2) for _ in sources]
+
+    def put(q, item):
+        # Give up when the consumer has stopped, instead of blocking on a full queue forever
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce(source, q):
+        try:
+            for chunk in read(source):
+                if not put(q, chunk):
+                    return
+        except BaseException as exc:
+            put(q, exc)
+        else:
+            put(q, _DONE)
+
+    with ThreadPoolExecutor(max_workers=parallel) as readers:
+        try:
+            started = 0
+            for i, q in enumerate(queues):
+                # Source i+parallel-1 starts once source i-1 is done, keeping `parallel` in flight
+                while started < min(len(sources), i + parallel):
+                    readers.submit(produce, sources[started], queues[started])
+                    started += 1
+                while True:
+                    item = q.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+        finally:
+            stop.set()
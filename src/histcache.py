@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+
+class HistCache:
+    """
+    Filled histogram contents cached on disk, one .npz per histogram.
+
+    Entries are keyed on a hash of the input file stamps (path, mtime, size), the tree
+    name and HistSpec.key() (expressions, weight/cut, ranges and bin edges), so a fill
+    is only reused while the ROOT file and the binning are unchanged. The directory is
+    kept under `max_bytes` by evicting the least recently used entries; reading an
+    entry refreshes its mtime.
+    """
+    def __init__(self, directory, data_io, max_bytes=256 * 1024 ** 2):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.source = {'file': data_io.stamp(), 'treename': data_io.treename}
+
+        # Entries of an older version of the file can never hit again: drop them
+        source_path = self.directory / "source.json"
+        try:
+            with open(source_path) as f:
+                current = json.load(f) == self.source
+        except (OSError, ValueError):
+            current = False
+        if not current:
+            self.invalidate()
+            with open(source_path, 'w') as f:
+                json.dump(self.source, f, indent=2)
+
+        self._sizes = {path.name: path.stat().st_size for path in self.directory.glob("*.npz")}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def default_directory(data_io):
+        return data_io.get_output_dir() / f"{data_io.name}.histcache"
+
+    def _path(self, spec):
+        key = json.dumps([self.source, repr(spec.key())])
+        return self.directory / f"{hashlib.sha1(key.encode()).hexdigest()}.npz"
+
+    def get(self, spec):
+        """
+        Return the cached (sumw, sumw2, entries) of a HistSpec, or None on a miss.
+        """
+        path = self._path(spec)
+        try:
+            with np.load(path) as data:
+                contents = data['sumw'], data['sumw2'], float(data['entries'])
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return contents
+
+    def put(self, spec, sumw, sumw2, entries):
+        """Store the contents of a filled HistSpec, then evict old entries beyond max_bytes."""
+        path = self._path(spec)
+        # A temporary name of our own, so concurrent writers of the same entry (e.g. render
+        # workers) never share it; the .tmp suffix keeps it out of the *.npz globs
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=path.stem, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, sumw=sumw, sumw2=sumw2, entries=entries)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._sizes[path.name] = path.stat().st_size
+        if sum(self._sizes.values()) > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in list(self._sizes):
+            try:
+                entries.append((os.stat(self.directory / name).st_mtime, name))
+            except FileNotFoundError:
+                # Removed by another process sharing the cache
+                del self._sizes[name]
+        total = sum(self._sizes.values())
+        for _, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes.pop(name)
+            try:
+                os.remove(self.directory / name)
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self, spec=None):
+        """
+        Remove the entry of one HistSpec, or every entry when `spec` is None.
+        """
+        paths = [self._path(spec)] if spec is not None else list(self.directory.glob("*.npz"))
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            if hasattr(self, '_sizes'):
+                self._sizes.pop(path.name, None)
+
+    @property
+    def nbytes(self):
+        return sum(self._sizes.values())
@@ -0,0 +1,353 @@
+import numpy as np
+
+
+# C++ helper compiled once per ROOT session. It loops over the tree a single time
+# and fills every booked histogram from its own TTreeFormula expressions, which
+# keeps the TTree::Draw expression language (branch names, cut strings) intact.
+_SINGLE_PASS_CODE = r"""
+#include <string>
+#include <vector>
+#include "TTree.h"
+#include "TTreeFormula.h"
+#include "TH1.h"
+#include "TH2.h"
+
+namespace eic_legacy {
+
+void FillHistogramsSinglePass(TTree* tree,
+                              const std::vector<TH1*>& hists,
+                              const std::vector<std::string>& x_exprs,
+                              const std::vector<std::string>& y_exprs,
+                              const std::vector<std::string>& w_exprs)
+{
+    const size_t n_hists = hists.size();
+    std::vector<TTreeFormula*> fx(n_hists, nullptr), fy(n_hists, nullptr), fw(n_hists, nullptr);
+    for (size_t i = 0; i < n_hists; ++i) {
+        fx[i] = new TTreeFormula(Form("_fx%zu", i), x_exprs[i].c_str(), tree);
+        if (!y_exprs[i].empty())
+            fy[i] = new TTreeFormula(Form("_fy%zu", i), y_exprs[i].c_str(), tree);
+        fw[i] = new TTreeFormula(Form("_fw%zu", i), w_exprs[i].c_str(), tree);
+    }
+
+    int current_tree = -1;
+    const Long64_t n_entries = tree->GetEntries();
+    for (Long64_t entry = 0; entry < n_entries; ++entry) {
+        if (tree->LoadTree(entry) < 0) break;
+        if (tree->GetTreeNumber() != current_tree) {
+            current_tree = tree->GetTreeNumber();
+            for (size_t i = 0; i < n_hists; ++i) {
+                fx[i]->UpdateFormulaLeaves();
+                if (fy[i]) fy[i]->UpdateFormulaLeaves();
+                fw[i]->UpdateFormulaLeaves();
+            }
+        }
+        for (size_t i = 0; i < n_hists; ++i) {
+            fw[i]->GetNdata();
+            const double w = fw[i]->EvalInstance(0);
+            // TTree::Draw skips entries with a zero weight, so do the same here
+            if (w == 0) continue;
+            fx[i]->GetNdata();
+            const double x = fx[i]->EvalInstance(0);
+            if (fy[i]) {
+                fy[i]->GetNdata();
+                static_cast<TH2*>(hists[i])->Fill(x, fy[i]->EvalInstance(0), w);
+            } else {
+                hists[i]->Fill(x, w);
+            }
+        }
+    }
+
+    for (size_t i = 0; i < n_hists; ++i) {
+        delete fx[i];
+        delete fy[i];
+        delete fw[i];
+    }
+}
+
+}
+"""
+
+_single_pass_declared = False
+
+
+def edges_from_config(config, log, name=None):
+    """
+    Build the bin edges for one entry of Plotter.plot_configs.
+
+    ROOT's automatic binning (x_min >= x_max) is not supported: every backend needs the
+    same fixed axis, so the range must be given explicitly.
+
+    :param config: plot_configs entry with 'x_range' and 'n_bins'
+    :param log: True for logarithmically spaced edges
+    :param name: plot_configs key of the entry, named in errors
+    :return: np.ndarray of n_bins+1 edges
+    """
+    x_min, x_max = config['x_range']
+    n_bins = config['n_bins']
+    if not x_min < x_max:
+        raise ValueError(f"x_range {config['x_range']} of '{name or config.get('branch_name', 'plot config')}' is empty; "
+                         "give an explicit (min, max) range instead of relying on ROOT auto-binning.")
+    if log:
+        return np.logspace(np.log10(x_min), np.log10(x_max), n_bins + 1)
+    return np.linspace(x_min, x_max, n_bins + 1)
+
+
+def _fixed_edges(expr, edges):
+    edges = np.asarray(edges, dtype=float)
+    if edges.ndim != 1 or len(edges) < 2 or not np.all(np.diff(edges) > 0):
+        raise ValueError(f"Bin edges of '{expr}' must be at least two strictly increasing values, got {edges}")
+    return edges
+
+
+class HistSpec:
+    """
+    Description of one histogram fill: what to draw, where, and with which selection.
+
+    The selection is a product of the `weight` expression and the optional list of
+    `ranges`, each a (branch, low, high) tuple requiring low <= branch <= high.
+    `rows` optionally names the BinIndex rows holding exactly the events the ranges
+    select, which lets the index serve the fill without reading the tree. Both give the
+    same contents, so `rows` is not part of the key.
+
+    The edges must be strictly increasing: the key (and so the in-memory and on-disk
+    caches) identifies a fill by its edges, which only holds for a fixed axis, not one
+    ROOT would pick from the data.
+    """
+    def __init__(self, name, x_expr, x_edges, y_expr=None, y_edges=None, weight="Weight", ranges=(), rows=None):
+        self.name = name
+        self.x_expr = x_expr
+        self.x_edges = _fixed_edges(x_expr, x_edges)
+        self.y_expr = y_expr
+        self.y_edges = None if y_edges is None else _fixed_edges(y_expr, y_edges)
+        self.weight = weight
+        self.ranges = tuple(ranges)
+        self.rows = None if rows is None else tuple(int(r) for r in rows)
+
+    def key(self):
+        """Hashable identity of the fill (everything except the histogram name)."""
+        y_edges = None if self.y_edges is None else tuple(self.y_edges)
+        return (self.x_expr, tuple(self.x_edges), self.y_expr, y_edges, self.weight, self.ranges)
+
+    @property
+    def is_2d(self):
+        return self.y_expr is not None
+
+    def cut(self):
+        """Return the ranges as a boolean expression ("" when there are none)."""
+        return " && ".join(f"{branch} >= {low} && {branch} <= {high}" for branch, low, high in self.ranges)
+
+    def selection(self):
+        """Return the selection as a TTree::Draw weight/cut string."""
+        if not self.ranges:
+            return self.weight
+        return f"({self.cut()}) * {self.weight}"
+
+    def branches(self):
+        """
+        Return the set of branch names this spec reads.
+
+        Only used by the NumPy backend, which needs plain branch names rather than
+        TTree::Draw expressions.
+        """
+        names = [self.x_expr] + [branch for branch, _, _ in self.ranges]
+        if self.is_2d:
+            names.append(self.y_expr)
+        if self.weight not in (None, "", "1"):
+            names.append(self.weight)
+        for name in names:
+            if not name.isidentifier():
+                raise ValueError(f"Expression '{name}' is not a plain branch name; "
+                                 "the uproot backend only supports branch names and (branch, min, max) ranges.")
+        return set(names)
+
+    def draw_expression(self):
+        """Return the varexp part of a TTree::Draw command (without the '>> hist')."""
+        if self.is_2d:
+            return f"{self.y_expr}:{self.x_expr}"
+        return self.x_expr
+
+
+def fill_root_single_pass(tree, fills):
+    """
+    Fill several ROOT histograms with one pass over a TTree (or TChain).
+
+    :param tree: ROOT.TTree to read
+    :param fills: list of (HistSpec, ROOT.TH1) pairs; the histograms are filled in place
+    """
+    import ROOT
+
+    global _single_pass_declared
+    if not fills:
+        return
+    if not _single_pass_declared:
+        ROOT.gInterpreter.Declare(_SINGLE_PASS_CODE)
+        _single_pass_declared = True
+
+    hists = ROOT.std.vector['TH1*']()
+    x_exprs = ROOT.std.vector['std::string']()
+    y_exprs = ROOT.std.vector['std::string']()
+    w_exprs = ROOT.std.vector['std::string']()
+    for spec, hist in fills:
+        hists.push_back(hist)
+        x_exprs.push_back(spec.x_expr)
+        y_exprs.push_back(spec.y_expr or "")
+        w_exprs.push_back(spec.selection())
+
+    print(f"[INFO] Filling {len(fills)} histograms in a single pass over {tree.GetEntries()} entries")
+    ROOT.eic_legacy.FillHistogramsSinglePass(tree, hists, x_exprs, y_exprs, w_exprs)
+
+
+def fill_rdataframe(data_io, fills):
+    """
+    Fill several ROOT histograms with one multithreaded RDataFrame event loop.
+
+    Every fill is booked as a lazy Histo1D/Histo2D action: expressions become Define'd
+    columns and ranges become Filters, both shared between fills that use the same
+    expression or cut. The loop then runs once for all of them, with implicit
+    multithreading over data_io.workers threads (all cores by default).
+
+    :param data_io: DataIO of the input file(s)
+    :param fills: list of (HistSpec, ROOT.TH1) pairs; the histograms are filled in place
+    """
+    import ROOT
+
+    if not fills:
+        return
+    if data_io.workers != 1:
+        ROOT.EnableImplicitMT(data_io.workers or 0)
+    files = ROOT.std.vector['std::string']()
+    for path in data_io.filepaths:
+        files.push_back(path)
+    df = ROOT.RDataFrame(data_io.treename, files)
+
+    # Expressions are defined once on the root node, so every filter can use them
+    columns = {}
+    for spec, _ in fills:
+        for expr in (spec.x_expr, spec.y_expr, spec.weight or "1.0"):
+            if expr is not None and expr not in columns:
+                columns[expr] = f"_col{len(columns)}"
+                df = df.Define(columns[expr], expr)
+
+    filters = {}
+    results = []
+    for spec, hist in fills:
+        x = columns[spec.x_expr]
+        w = columns[spec.weight or "1.0"]
+        cut = spec.cut()
+        if cut not in filters:
+            filters[cut] = df.Filter(cut) if cut else df
+        node = filters[cut]
+        name = f"{hist.GetName()}_rdf"
+        if spec.is_2d:
+            model = ROOT.RDF.TH2DModel(name, "", len(spec.x_edges) - 1, spec.x_edges, len(spec.y_edges) - 1, spec.y_edges)
+            results.append(node.Histo2D(model, x, columns[spec.y_expr], w))
+        else:
+            model = ROOT.RDF.TH1DModel(name, "", len(spec.x_edges) - 1, spec.x_edges)
+            results.append(node.Histo1D(model, x, w))
+
+    print(f"[INFO] Filling {len(fills)} histograms in one RDataFrame event loop")
+    ROOT.RDF.RunGraphs(results)
+    for (_, hist), result in zip(fills, results):
+        set_hist_contents(hist, *hist_contents(result.GetPtr()))
+
+
+def _with_flow(edges):
+    """Edges with an underflow and an overflow bin, as ROOT numbers them (0 and n+1)."""
+    return np.concatenate(([-np.inf], edges, [np.inf]))
+
+
+def fill_numpy(chunks, specs):
+    """
+    Fill histograms with NumPy from an iterator of branch chunks.
+
+    Only one chunk is held in memory at a time, so peak memory is bounded by the
+    chunk size rather than the tree size. The contents include the under- and
+    overflow bins, and the bins are [low, high) like ROOT's: a value equal to the
+    upper edge goes to the overflow.
+
+    :param chunks: iterable of dicts mapping branch name -> np.ndarray (e.g. DataIO.iterate)
+    :param specs: list of HistSpec
+    :return: list of [sumw, sumw2, entries], aligned with `specs`; the arrays have shape
+        (nx+2,) or (nx+2, ny+2), see hist_contents
+    """
+    results = []
+    for spec in specs:
+        shape = (len(spec.x_edges) + 1,) if not spec.is_2d else (len(spec.x_edges) + 1, len(spec.y_edges) + 1)
+        results.append([np.zeros(shape), np.zeros(shape), 0])
+
+    for chunk in chunks:
+        for spec, result in zip(specs, results):
+            sumw, sumw2 = result[0], result[1]
+            x = chunk[spec.x_expr]
+            if spec.weight in (None, "", "1"):
+                w = np.ones(len(x))
+            else:
+                w = np.asarray(chunk[spec.weight], dtype=float)
+            mask = w != 0
+            for branch, low, high in spec.ranges:
+                values = chunk[branch]
+                mask &= (values >= low) & (values <= high)
+            if not mask.any():
+                continue
+            x, w = x[mask], w[mask]
+            result[2] += len(w)
+            if spec.is_2d:
+                y = chunk[spec.y_expr][mask]
+                bins = (_with_flow(spec.x_edges), _with_flow(spec.y_edges))
+                sumw += np.histogram2d(x, y, bins=bins, weights=w)[0]
+                sumw2 += np.histogram2d(x, y, bins=bins, weights=w * w)[0]
+            else:
+                bins = _with_flow(spec.x_edges)
+                sumw += np.histogram(x, bins=bins, weights=w)[0]
+                sumw2 += np.histogram(x, bins=bins, weights=w * w)[0]
+    return results
+
+
+def hist_contents(hist):
+    """
+    Read the bin contents of a ROOT TH1/TH2 back into NumPy, under- and overflow included.
+
+    :return: (sumw, sumw2, entries); the arrays have shape (nx+2,) or (nx+2, ny+2) and are
+        indexed like ROOT bins, so [0] is the underflow and [nx+1] the overflow
+    """
+    nx = hist.GetNbinsX()
+    if hist.GetDimension() == 1:
+        sumw = np.array([hist.GetBinContent(ix) for ix in range(nx + 2)])
+        errors = np.array([hist.GetBinError(ix) for ix in range(nx + 2)])
+    else:
+        ny = hist.GetNbinsY()
+        sumw = np.array([[hist.GetBinContent(ix, iy) for iy in range(ny + 2)] for ix in range(nx + 2)])
+        errors = np.array([[hist.GetBinError(ix, iy) for iy in range(ny + 2)] for ix in range(nx + 2)])
+    return sumw, errors ** 2, hist.GetEntries()
+
+
+def set_hist_contents(hist, sumw, sumw2, entries):
+    """
+    Copy NumPy bin contents into an existing ROOT TH1/TH2 with matching binning.
+
+    :param hist: ROOT.TH1F or ROOT.TH2F
+    :param sumw: array of bin contents with under- and overflow, shape (nx+2,) or (nx+2, ny+2)
+    :param sumw2: array of summed squared weights with the same shape
+    :param entries: number of entries the contents were filled from
+    """
+    nx = hist.GetNbinsX()
+    expected = (nx + 2,) if hist.GetDimension() == 1 else (nx + 2, hist.GetNbinsY() + 2)
+    if sumw.shape != expected:
+        raise ValueError(f"Contents of shape {sumw.shape} do not match histogram '{hist.GetName()}' "
+                         f"with {expected} bins (under- and overflow included)")
+    hist.Reset()
+    hist.Sumw2()
+    if sumw.ndim == 1:
+        for ix in range(sumw.shape[0]):
+            hist.SetBinContent(ix, sumw[ix])
+            hist.SetBinError(ix, np.sqrt(sumw2[ix]))
+    else:
+        for ix in range(sumw.shape[0]):
+            for iy in range(sumw.shape[1]):
+                if sumw[ix, iy] == 0 and sumw2[ix, iy] == 0:
+                    continue
+                hist.SetBinContent(ix, iy, sumw[ix, iy])
+                hist.SetBinError(ix, iy, np.sqrt(sumw2[ix, iy]))
+    # SetBinContent counts as a fill, so the entries are restored last
+    hist.SetEntries(entries)
+    return hist
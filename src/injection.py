@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# Injection studies in Python. Reads the tree once, assigns every event to a bin of
+# the grid, and runs all pseudo-experiments of all bins as batched NumPy operations.
+# Writes the same `jobs` YAML as tmd-eic-ana's `inject`, so PostProcessor reads it unchanged.
+# With --extract, events come from a preselection extract built once per file, table and
+# grid (see InjectionStudy.extract), and a run over a bin range only maps its own slice.
+#
+#   python3 src/injection.py --file out/.../analysis.root --tree dihadron_tree --energy 10x100 \
+#       --table analysis/yorgo/tables/x_binning_table.csv --outDir analysis/yorgo/injectout/... \
+#       --channel Dihadron --eic_timeline EarlyScience --target Proton --grid X \
+#       --n_injections 1000 --targetPolarization 0.7 --mc_lumi 861.57
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from asymfit import FITTERS
+from binindex import BinIndex, GridAssigner, table_values, variable_branch
+from dataio import DataIO
+from binning_tables import load_table
+
+# Integrated luminosities [fb^-1] per (energy, eic_timeline, target), as in tmd-eic-ana's Constants.h
+INTEGRATED_LUMINOSITIES = {
+    ("5x41", "Full", "Proton"): 2.86,
+    ("10x100", "Full", "Proton"): 51.3,
+    ("18x275", "Full", "Proton"): 10.0,
+    ("10x100", "EarlyScience", "Proton"): 10.0,
+    ("10x166", "EarlyScience", "Helium3"): 8.65,
+}
+NB_PER_FB = 1e6
+
+# Azimuthal angle modulating the injected asymmetry, per channel
+DEFAULT_PHI = {'Dihadron': 'PhiRperp', 'Hadron': 'PhiH'}
+
+# avg_<name> written per bin, and the table variable each is computed from
+AVERAGES = ('X', 'Q', 'Q2', 'Z', 'PhPerp', 'Y')
+
+# Branches kept by the preselection extract, when present in the tree
+INJECTION_BRANCHES = ('X', 'Q2', 'Z', 'PhPerp', 'Mh', 'Y', 'PhiRperp', 'PhiH', 'Depol', 'Weight')
+
+# Elements of the (injections x events) spin matrix generated at once
+BLOCK_SIZE = 1 << 22
+
+
+class InjectionStudy:
+    """
+    Injection study over all bins of a grid.
+
+    The events of every bin are assigned a spin by accept/reject sampling against
+    (1 + P * AUT * sin(phi)) / 2, and the asymmetry of every pseudo-experiment of every bin
+    is extracted in one batched call per block of injections (see asymfit.py): the weighted
+    moment estimator, or a weighted maximum-likelihood fit.
+    """
+    def __init__(self, data_io, table_path, grid, n_injections=1000, target_polarization=1.0,
+                 phi='PhiRperp', weight='Weight', exp_lumi=None, mc_lumi=None, max_entries=None,
+                 used_reconstructed_kinematics=True, fit='moments', use_extract=False, seed=None):
+        """
+        :param data_io: DataIO of the input tree (one file or a chain)
+        :param table_path: Binning table (.csv/.parquet or bundle)
+        :param grid: Grid variables, list or comma separated string (e.g. "X,Q,Z,Mh")
+        :param n_injections: Pseudo-experiments per bin
+        :param target_polarization: Target polarization P
+        :param phi: Branch holding the modulation angle
+        :param weight: Event weight branch, or None for unweighted events
+        :param exp_lumi: Expected EIC luminosity [nb^-1] written to the output
+        :param mc_lumi: Luminosity of the simulation [nb^-1]; with exp_lumi gives expected_events
+        :param max_entries: Read at most this many entries (None or <= 0: all)
+        :param used_reconstructed_kinematics: Recorded in the output
+        :param fit: 'moments' (closed form) or 'likelihood' (batched Newton maximum likelihood)
+        :param use_extract: Read events from the preselection extract (built on first use) instead of the tree
+        :param seed: Seed of the random generator
+        """
+        self.data_io = data_io
+        self.table_path = table_path
+        self.table = load_table(table_path)
+        self.table_df = self.table.to_dataframe()
+        self.grid = [g.strip() for g in grid.split(",")] if isinstance(grid, str) else list(grid)
+        self.n_injections = n_injections
+        self.polarization = target_polarization
+        self.phi = phi
+        self.weight = weight
+        self.exp_lumi = exp_lumi
+        self.mc_lumi = mc_lumi
+        self.max_entries = max_entries if max_entries and max_entries > 0 else None
+        self.used_reconstructed_kinematics = used_reconstructed_kinematics
+        if fit not in FITTERS:
+            raise ValueError(f"Unknown fit '{fit}', expected one of {', '.join(FITTERS)}")
+        self.fit = fit
+        self.use_extract = use_extract
+        self.rng = np.random.default_rng(seed)
+
+        # Bins are numbered like the Ruby workflow: unique grid keys in order of first appearance
+        self.keys, self.bin_of_row = self.table.unique_bins(self.grid)
+        self.n_bins = len(self.keys)
+        self.aut = self._bin_aut()
+
+    def _bin_aut(self):
+        """
+        AUT injected in every grid bin.
+
+        A grid coarser than the table (e.g. X of an X,Q,Z,Mh table) spans several rows,
+        which must then agree on AUT: the study injects one value per bin.
+        """
+        bin_of_row = np.asarray(self.bin_of_row)
+        aut = self.table_df['AUT'].to_numpy(dtype=float)
+        low = np.full(self.n_bins, np.inf)
+        high = np.full(self.n_bins, -np.inf)
+        np.minimum.at(low, bin_of_row, aut)
+        np.maximum.at(high, bin_of_row, aut)
+        mixed = np.flatnonzero(low != high)
+        if len(mixed):
+            raise ValueError(f"The table rows of {len(mixed)} bins of grid {','.join(self.grid)} have different AUT "
+                             f"values (first: bin {mixed[0]}, AUT {low[mixed[0]]} to {high[mixed[0]]}); one value "
+                             "is injected per bin, so use a grid with one AUT per bin.")
+        return low
+
+    def grid_table(self):
+        """Grid bins as a table: one row per bin, with the <var>_min/<var>_max columns of the grid variables."""
+        return self.table.grid_table(self.grid)
+
+    def extract(self, branches=()):
+        """
+        Load the preselection extract of this file, table and grid, building it if needed.
+
+        The extract is a BinIndex keyed on the grid bins: the injection branches present in
+        the tree (INJECTION_BRANCHES plus `branches`) and the tree entry number, sorted by
+        bin, with per-bin offsets. It is written once next to the ROOT file and reused by
+        every later study and job on the same inputs; each run memory-maps only its bins.
+        For a grid with overlapping bins (see GridAssigner), an event is stored in each of
+        its bins.
+        """
+        available = set(self.data_io.keys())
+        stored = [b for b in dict.fromkeys(INJECTION_BRANCHES + tuple(branches)) if b in available]
+        directory = BinIndex.default_directory(self.data_io, self.table_path, tag="_".join(self.grid))
+        return BinIndex.load_or_build(self.data_io, self.grid_table(), self.table_path,
+                                      branches=stored, directory=directory)
+
+    def _read_tree(self, branches, bin_start, bin_end):
+        """
+        Read the tree once; return the bin and branch values of the events in bins bin_start..bin_end.
+
+        With overlapping grid bins an event is returned once for every bin it is in, as if
+        the tree were cut separately for each bin.
+        """
+        assigner = GridAssigner(self.grid_table())
+        if assigner.overlapping:
+            print(f"[INFO] The bins of grid {','.join(self.grid)} overlap: events are assigned to every bin they fall in")
+        branches = set(branches) | {variable_branch(v) for v in assigner.variables}
+        bins, columns = [], {b: [] for b in branches}
+        n_read = 0
+        for chunk in self.data_io.iterate(branches):
+            if self.max_entries is not None:
+                chunk = {k: v[:self.max_entries - n_read] for k, v in chunk.items()}
+            n_read += len(next(iter(chunk.values())))
+            events, rows = assigner.assign({v: table_values(v, chunk) for v in assigner.variables},
+                                           first_row=bin_start, last_row=bin_end)
+            bins.append(rows)
+            for b in branches:
+                columns[b].append(chunk[b][events])
+            if self.max_entries is not None and n_read >= self.max_entries:
+                break
+        print(f"[INFO] Read {n_read} entries from {self.data_io.filepath}")
+        return (np.concatenate(bins) if bins else np.empty(0, dtype=np.int64),
+                {b: np.concatenate(v) if v else np.empty(0) for b, v in columns.items()})
+
+    def _read_extract(self, branches, bin_start, bin_end):
+        """Map the slice of bins bin_start..bin_end from the preselection extract."""
+        index = self.extract(branches)
+        lo, hi = index.offsets[bin_start], index.offsets[bin_end + 1]
+        columns = {b: np.asarray(index.column(b)[lo:hi]) for b in set(branches) | {'entry'}}
+        bins = np.repeat(np.arange(bin_start, bin_end + 1), index.counts[bin_start:bin_end + 1])
+        if self.max_entries is not None:
+            keep = columns['entry'] < self.max_entries
+            bins = bins[keep]
+            columns = {b: v[keep] for b, v in columns.items()}
+        print(f"[INFO] Mapped {hi - lo} events of bins {bin_start} to {bin_end} from {index.directory}")
+        return bins, columns
+
+    def read_events(self, bin_start=0, bin_end=None):
+        """
+        Read the events of bins bin_start..bin_end (default: all), sorted by bin.
+
+        Sets self.events (dict of branch -> values), self.offsets (events of bin b are
+        offsets[b]:offsets[b+1]) and self.counts.
+        """
+        bin_end = self.n_bins - 1 if bin_end is None else min(bin_end, self.n_bins - 1)
+        available = set(self.data_io.keys())
+        averages = [a for a in AVERAGES if variable_branch(a) in available]
+        branches = {variable_branch(a) for a in averages} | {self.phi}
+        if self.weight:
+            branches.add(self.weight)
+
+        read = self._read_extract if self.use_extract else self._read_tree
+        bins, chunk = read(branches, bin_start, bin_end)
+
+        order = np.argsort(bins, kind='stable')
+        self.events = {
+            'phi': np.asarray(chunk[self.phi], dtype=float)[order],
+            'weight': np.asarray(chunk[self.weight], dtype=float)[order] if self.weight else np.ones(len(bins)),
+        }
+        for name in averages:
+            self.events[name] = np.asarray(table_values(name, chunk), dtype=float)[order]
+        self.event_bin = bins[order]
+        self.counts = np.bincount(self.event_bin, minlength=self.n_bins)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)])
+        self.averages = averages
+        print(f"[INFO] {len(order)} events in bins {bin_start} to {bin_end}")
+
+    def run(self):
+        """
+        Run every pseudo-experiment of every bin.
+
+        :return: (extracted, errors), arrays of shape (n_bins, n_injections)
+        """
+        if not hasattr(self, 'events'):
+            self.read_events()
+        sin_phi = np.sin(self.events['phi'])
+        w = self.events['weight']
+        bins = self.event_bin
+        n_events = len(bins)
+        fit = FITTERS[self.fit]
+
+        # Probability of spin up for each event
+        p_up = 0.5 * (1 + self.polarization * self.aut[bins] * sin_phi)
+
+        extracted = np.empty((self.n_bins, self.n_injections))
+        errors = np.empty((self.n_bins, self.n_injections))
+        block = max(1, BLOCK_SIZE // max(n_events, 1))
+        for start in range(0, self.n_injections, block):
+            stop = min(start + block, self.n_injections)
+            # Accept/reject: an event is spin up if u < p_up, else spin down
+            spins = np.where(self.rng.random((stop - start, n_events)) < p_up, 1.0, -1.0)
+            extracted[:, start:stop], errors[:, start:stop] = fit(
+                sin_phi, spins, w, self.polarization, bins=bins, n_bins=self.n_bins)
+        return extracted, errors
+
+    def jobs(self, extracted, errors, bin_start=0, bin_end=None):
+        """
+        Build the `jobs` entries of bins bin_start..bin_end (inclusive), in the schema of `inject`.
+        """
+        bin_end = self.n_bins - 1 if bin_end is None else bin_end
+        # Only the ranges of the grid variables: the other table variables vary inside a bin
+        grid_df = self.grid_table()
+        w = self.events['weight']
+        jobs = []
+        for b in range(bin_start, bin_end + 1):
+            lo, hi = self.offsets[b], self.offsets[b + 1]
+            job = {'bin_index': int(b), 'events': int(hi - lo)}
+            job['expected_events'] = (float(w[lo:hi].sum() * self.exp_lumi / self.mc_lumi)
+                                      if self.exp_lumi and self.mc_lumi else None)
+            for col in grid_df.columns:
+                job[col] = _scalar(grid_df[col].iat[b])
+            job['used_reconstructed_kinematics'] = bool(self.used_reconstructed_kinematics)
+            job['n_injections'] = int(self.n_injections)
+            job['injected'] = float(self.aut[b])
+            finite = hi > lo
+            job['all_extracted'] = extracted[b].tolist() if finite else []
+            job['all_errors'] = errors[b].tolist() if finite else []
+            job['mean_extracted'] = float(np.mean(extracted[b])) if finite else float('nan')
+            job['stddev_extracted'] = float(np.std(extracted[b])) if finite else float('nan')
+            for name in self.averages:
+                values = self.events[name][lo:hi]
+                job[f"avg_{name}"] = float(np.average(values, weights=w[lo:hi])) if finite and w[lo:hi].sum() else float('nan')
+            job['exp_lumi [nb^-1]'] = self.exp_lumi
+            job['mc_lumi [nb^-1]'] = self.mc_lumi
+            jobs.append(job)
+        return jobs
+
+    def write(self, out_dir, bins_per_file=None, bin_start=0, bin_end=None, out_filename=None):
+        """
+        Run the study and write bins_<first>_to_<last>.yaml files of `bins_per_file` bins each.
+
+        :param out_filename: Write all bins of bin_start..bin_end to this one file instead
+        :return: List of written paths
+        """
+        import yaml
+        dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+        if not hasattr(self, 'events'):
+            self.read_events(bin_start, bin_end)
+        start = time.perf_counter()
+        extracted, errors = self.run()
+        print(f"[INFO] {self.n_injections} injections x {self.n_bins} bins in {time.perf_counter() - start:.1f} s")
+
+        bin_end = self.n_bins - 1 if bin_end is None else min(bin_end, self.n_bins - 1)
+        os.makedirs(out_dir, exist_ok=True)
+        if out_filename:
+            groups = [(bin_start, bin_end, out_filename)]
+        else:
+            size = bins_per_file or (bin_end - bin_start + 1)
+            groups = [(first, min(first + size - 1, bin_end), f"bins_{first}_to_{min(first + size - 1, bin_end)}.yaml")
+                      for first in range(bin_start, bin_end + 1, size)]
+        paths = []
+        for first, last, name in groups:
+            path = os.path.join(out_dir, name)
+            with open(path, 'w') as f:
+                yaml.dump({'jobs': self.jobs(extracted, errors, first, last)}, f,
+                          Dumper=dumper, sort_keys=False, default_flow_style=None)
+            paths.append(path)
+        print(f"[INFO] Wrote {len(paths)} YAML file(s) to {out_dir}")
+        return paths
+
+
+def _scalar(value):
+    value = value.item() if hasattr(value, 'item') else value
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def _bool(text):
+    return str(text).lower() in ("1", "true", "yes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an injection study in Python (same options and output as tmd-eic-ana's inject).")
+    parser.add_argument("--file", required=True, help="ROOT file, glob or comma separated list")
+    parser.add_argument("--tree", required=True)
+    parser.add_argument("--energy", required=True)
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--outDir", required=True)
+    parser.add_argument("--maxEntries", type=int, default=-1)
+    parser.add_argument("--channel", default="Dihadron")
+    parser.add_argument("--eic_timeline", default="Full")
+    parser.add_argument("--target", default="Proton")
+    parser.add_argument("--grid", default="X")
+    parser.add_argument("--n_injections", type=int, default=1000)
+    parser.add_argument("--extract_with_true", type=_bool, default=False)
+    parser.add_argument("--targetPolarization", type=float, default=1.0)
+    parser.add_argument("--bin_index_start", type=int, default=0)
+    parser.add_argument("--bin_index_end", type=int, default=None)
+    parser.add_argument("--outFilename", default=None)
+    parser.add_argument("--bins_per_file", type=int, default=None, help="Bins per output YAML (default: one file)")
+    parser.add_argument("--phi", default=None, help="Modulation angle branch (default: by channel)")
+    parser.add_argument("--weight", default="Weight")
+    parser.add_argument("--mc_lumi", type=float, default=None,
+                        help="Simulated luminosity [nb^-1], as reported by inject; required to run a study")
+    parser.add_argument("--fit", choices=("moments", "likelihood"), default="moments")
+    parser.add_argument("--extract", action="store_true",
+                        help="Read events from the preselection extract, building it on first use")
+    parser.add_argument("--preselect_only", action="store_true", help="Only build the preselection extract")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.extract_with_true:
+        print("Error: --extract_with_true is not supported by the Python engine; use tmd-eic-ana's inject.")
+        sys.exit(1)
+    if args.mc_lumi is None and not args.preselect_only:
+        # Without it expected_events, and so the expected EIC errors, cannot be computed
+        print("Error: --mc_lumi is required; use the 'mc_lumi [nb^-1]' that inject reports for this file.")
+        sys.exit(1)
+
+    lumi = INTEGRATED_LUMINOSITIES.get((args.energy, args.eic_timeline, args.target))
+    study = InjectionStudy(
+        DataIO(args.file.split(",") if "," in args.file else args.file, args.tree),
+        args.table, args.grid,
+        n_injections=args.n_injections,
+        target_polarization=args.targetPolarization,
+        phi=args.phi or DEFAULT_PHI.get(args.channel, 'PhiH'),
+        weight=args.weight or None,
+        exp_lumi=lumi * NB_PER_FB if lumi is not None else None,
+        mc_lumi=args.mc_lumi,
+        max_entries=args.maxEntries,
+        fit=args.fit,
+        use_extract=args.extract,
+        seed=args.seed,
+    )
+    if args.preselect_only:
+        study.extract()
+        return
+    study.write(args.outDir, bins_per_file=args.bins_per_file, bin_start=args.bin_index_start,
+                bin_end=args.bin_index_end, out_filename=args.outFilename)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,20 @@ require 'fileutils'
 require 'time'
 require 'csv'
 require 'set'
+require 'json'
+require_relative 'job_packing'
+require_relative 'local_executor'
 
 module InjectionWorkflow
+    include JobPacking
+    include LocalExecutor
+
     def run_injection_workflow(cfg)
     outDir = "#{cfg[:main_outdir]}/#{cfg[:channel]}/#{cfg[:energy]}/#{cfg[:eic_timeline]}/#{cfg[:target]}/#{cfg[:grid]}/"
     FileUtils.mkdir_p(outDir) unless Dir.exist?(outDir)
     
-    # Delete yaml files in outDir
-    Dir.glob("#{outDir}/*.yaml").each { |f| File.delete(f) }
+    # Delete yaml files (and their local-run completion records) in outDir, unless resuming a previous run
+    Dir.glob(["#{outDir}/*.yaml", "#{outDir}/*.yaml.done"]).each { |f| File.delete(f) } unless cfg[:resume]
 
     timestamp = Time.now.strftime("%Y%m%d_%H%M%S")
     job_dir = "#{outDir}/slurm/#{timestamp}"
@@ -22,16 +28,18 @@ module InjectionWorkflow
     invalid = grid_list.reject { |g| allowed_grids.include?(g) }
     raise "Invalid grid values: #{invalid.join(", ")}" if invalid.any?
 
-    # Determine unique bins
-    unique_bins = Set.new
-    CSV.foreach(cfg[:table], col_sep: ",", headers: true) do |row|
-        key = grid_list.flat_map do |g|
-        ["#{g}_min", "#{g}_max"].map { |col| row[col].to_f }
+    # Determine unique bins, from the table bundle written by src/binning_tables.py when it is current
+    bins = cached_unique_bin_count(cfg[:table], grid_list)
+    if bins.nil?
+        unique_bins = Set.new
+        CSV.foreach(cfg[:table], col_sep: ",", headers: true) do |row|
+            key = grid_list.flat_map do |g|
+            ["#{g}_min", "#{g}_max"].map { |col| row[col].to_f }
+            end
+            unique_bins.add(key)
         end
-        unique_bins.add(key)
+        bins = unique_bins.size
     end
-
-    bins = unique_bins.size
     puts "Detected #{bins} unique bins for grid #{grid_list.join(",")}."
 
     # Logging
@@ -43,15 +51,54 @@ module InjectionWorkflow
         log.puts "=====================================\n"
     end
 
+    # engine: "python" runs every bin in one process with src/injection.py (no SLURM, no eic-shell)
+    if cfg[:engine] == "python"
+        # inject computes the simulated luminosity itself; the Python engine needs it given
+        raise "engine: \"python\" needs mc_lumi: (simulated luminosity in nb^-1, as reported by inject)" unless cfg[:mc_lumi]
+        cmd = [
+        "python3", "src/injection.py",
+        "--file", cfg[:file],
+        "--tree", cfg[:tree],
+        "--energy", cfg[:energy],
+        "--table", cfg[:table],
+        "--outDir", outDir,
+        "--maxEntries", cfg[:maxEntries].to_s,
+        "--channel", cfg[:channel],
+        "--eic_timeline", cfg[:eic_timeline],
+        "--target", cfg[:target],
+        "--grid", cfg[:grid],
+        "--n_injections", cfg[:n_injections].to_s,
+        "--extract_with_true", cfg[:extract_with_true].to_s,
+        "--targetPolarization", cfg[:targetPolarization].to_s,
+        "--bins_per_file", cfg[:bins_per_slurm_job].to_s,
+        "--mc_lumi", cfg[:mc_lumi].to_s
+        ]
+        cmd += ["--phi", cfg[:phi]] if cfg[:phi]
+        cmd += ["--fit", cfg[:fit]] if cfg[:fit]
+        # preselect: true reads the events from the extract next to the ROOT file (built once)
+        cmd += ["--extract"] if cfg[:preselect]
+        puts "\nRunning: #{cmd.join(' ')}\n"
+        system(*cmd) or raise "Python injection engine failed."
+        return []
+    end
+
+    # Bins per job, balanced by event counts when they are known (see job_packing.rb).
+    # A resumed run keeps the bin ranges of the run it continues.
+    jobs = (cfg[:resume] && load_job_plan(cfg, outDir, bins)) || plan_jobs(cfg, outDir, bins, grid_list)
+    save_job_plan(cfg, outDir, bins, jobs)
+
     slurm_scripts = []
 
     # Create SLURM scripts
-    (0...bins).each_slice(cfg[:bins_per_slurm_job]) do |bin_group|
-        job_name = "inj_#{bin_group.first}_to_#{bin_group.last}_#{cfg[:energy]}"
+    jobs.each_with_index do |job, job_index|
+        runs = contiguous_runs(job)
+        job_name = runs.size == 1 ? "inj_#{job.first}_to_#{job.last}_#{cfg[:energy]}" : "inj_job#{job_index}_#{cfg[:energy]}"
         slurm_path  = File.join(job_dir, "slurm_#{job_name}.slurm")
         script_path = File.join(job_dir, "slurm_#{job_name}.sh")
 
-        cmd = [
+        # One inject call per run of consecutive bins
+        cmds = runs.map do |first, last|
+            [
             "./submodules/tmd-eic-ana/bin/inject",
             "--file #{cfg[:file]}",
             "--tree #{cfg[:tree]}",
@@ -66,14 +113,15 @@ module InjectionWorkflow
             "--n_injections #{cfg[:n_injections]}",
             "--extract_with_true #{cfg[:extract_with_true]}",
             "--targetPolarization #{cfg[:targetPolarization]}",
-            "--bin_index_start #{bin_group.first}",
-            "--bin_index_end #{bin_group.last}",
-            "--outFilename bins_#{bin_group.first}_to_#{bin_group.last}.yaml"
-        ]
+            "--bin_index_start #{first}",
+            "--bin_index_end #{last}",
+            "--outFilename bins_#{first}_to_#{last}.yaml"
+            ]
+        end
         File.open(script_path, "w") do |f|
         f.puts "#!/bin/bash"
         f.puts "export LD_LIBRARY_PATH=#{ENV['HOME']}/.local/lib64:#{ENV['LD_LIBRARY_PATH']}"
-        f.puts cmd.join(' ')
+        cmds.each { |cmd| f.puts cmd.join(' ') }
         end
         FileUtils.chmod("+x", script_path)
 
@@ -98,22 +146,12 @@ module InjectionWorkflow
 
     puts "\nSLURM job scripts located in: #{job_dir}\n"
 
-    # Prompt for execution mode
-    loop do
-        puts "Choose execution mode:"
-        puts "1: Submit batch jobs (Must be currently **outside** eic-shell)"
-        puts "2: Run directly (Must be currently **inside** eic-shell)"
-        puts "3: Cancel"
-        print "> "
-        case STDIN.gets.strip
-        when "1"
-        slurm_scripts.each { |s| system("sbatch #{s}") }
-        puts "Submitted #{slurm_scripts.size} jobs."
-        break
-        when "2"
-        puts "Running locally..."
-        (0...bins).each_slice(cfg[:bins_per_slurm_job]) do |bin_group|
-            cmd = [
+    # One local task per inject call
+    tasks = jobs.flat_map { |job| contiguous_runs(job) }.map do |first, last|
+        {
+        name: "bins_#{first}_to_#{last}",
+        output: File.join(outDir, "bins_#{first}_to_#{last}.yaml"),
+        cmd: [
             "./submodules/tmd-eic-ana/bin/inject",
             "--file", cfg[:file],
             "--tree", cfg[:tree],
@@ -128,21 +166,74 @@ module InjectionWorkflow
             "--n_injections", cfg[:n_injections].to_s,
             "--extract_with_true", cfg[:extract_with_true].to_s,
             "--targetPolarization", cfg[:targetPolarization].to_s,
-            "--outFilename", "bins_#{bin_group.first}_to_#{bin_group.last}.yaml",
-            "--bin_index_start", bin_group.first.to_s,
-            "--bin_index_end",   bin_group.last.to_s
-            ]
-            puts "\nRunning: #{cmd.join(' ')}\n"
-            system(cmd.join(' '))
+            "--outFilename", "bins_#{first}_to_#{last}.yaml",
+            "--bin_index_start", first.to_s,
+            "--bin_index_end",   last.to_s
+        ]
+        }
+    end
+    # Outputs of bin ranges outside this plan (a run without a saved plan) would cover bins twice
+    if cfg[:resume]
+        planned = tasks.map { |task| File.expand_path(task[:output]) }
+        stale = Dir.glob("#{outDir}/bins_*_to_*.yaml").reject { |f| planned.include?(File.expand_path(f)) }
+        unless stale.empty?
+            puts "Removing #{stale.size} outputs whose bin ranges are not in the job plan; their bins are redone."
+            stale.each { |f| FileUtils.rm_f([f, "#{f}.done"]) }
         end
-        puts "All local injections completed."
-        break
+    end
+    run_locally = lambda do
+        run_local(tasks, File.join(job_dir, "logs"), workers: cfg[:local_workers],
+                  retries: cfg.fetch(:retries, 1), resume: cfg[:resume])
+    end
+    submit = lambda do
+        slurm_scripts.each { |s| system("sbatch #{s}") }
+        puts "Submitted #{slurm_scripts.size} jobs."
+        []
+    end
+
+    # execution_mode: "slurm" or "local" runs without asking (e.g. from a batch script);
+    # the default "prompt" asks. Returns the local tasks that failed (none when submitting).
+    case cfg.fetch(:execution_mode, "prompt")
+    when "slurm"
+        return submit.call
+    when "local"
+        return run_locally.call
+    when "prompt"
+    else
+        raise "Unknown execution_mode '#{cfg[:execution_mode]}', expected prompt, slurm or local"
+    end
+
+    # Prompt for execution mode
+    loop do
+        puts "Choose execution mode:"
+        puts "1: Submit batch jobs (Must be currently **outside** eic-shell)"
+        puts "2: Run directly (Must be currently **inside** eic-shell)"
+        puts "3: Cancel"
+        print "> "
+        case STDIN.gets.strip
+        when "1"
+        return submit.call
+        when "2"
+        return run_locally.call
         when "3"
         puts "Cancelled."
-        break
+        return []
         else
         puts "Invalid input."
         end
     end
     end
+
+    # Number of unique bins for a grid, read from "<table>.bundle/schema.json".
+    # Returns nil when there is no bundle, it is stale, or the grid was never computed
+    # (run `python3 src/binning_tables.py <table> <grid>` to fill it in).
+    def cached_unique_bin_count(table, grid_list)
+        schema_path = File.join(File.dirname(table), "#{File.basename(table, '.*')}.bundle", "schema.json")
+        return nil unless File.exist?(schema_path)
+        schema = JSON.parse(File.read(schema_path))
+        source = schema["source"] || {}
+        return nil unless source["size"] == File.size(table)
+        return nil unless (source["mtime"].to_f - File.mtime(table).to_f).abs < 1e-3
+        schema.fetch("unique_bins", {})[grid_list.join(",")]
+    end
 end
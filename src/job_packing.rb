@@ -0,0 +1,184 @@
+#!/usr/bin/env ruby
+require 'csv'
+require 'json'
+
+# Work-balanced packing of injection bins into jobs.
+#
+# The cost of a bin is its number of MC events plus a fixed per-bin overhead. Event counts
+# come from (first found):
+#   1. cfg[:bin_costs]: a CSV with bin_index,events columns
+#   2. ALL_INJECTION_RESULTS.csv of a previous run in the output directory
+#   3. an `events` column of the binning table, summed over the rows of each bin
+#   4. cfg[:prescan]: a pre-scan of the tree with `python3 src/binindex.py`
+# Without any of them the bins are sliced uniformly by bins_per_slurm_job, as before.
+#
+# `inject` takes a range of bins, so a job runs one inject call per run of consecutive
+# bins in its list, and every call decompresses the whole tree again: a call costs about
+# as much as all the events, whatever its bins (cfg[:call_overhead] overrides that).
+# cfg[:packing] picks "lpt" (longest processing time first, any bins per job),
+# "contiguous" (one range per job), "uniform", or "auto" (default: lpt or contiguous,
+# whichever is predicted faster).
+#
+# Outputs are named after their bin range, so a resumed run must reuse the ranges of the
+# run it continues: the plan is saved as job_plan.json in the output directory and read
+# back when resuming (see load_job_plan).
+module JobPacking
+    # Cost of a bin besides its events (setting up the fits), in events
+    DEFAULT_BIN_OVERHEAD = 1_000
+
+    # Jobs to run: arrays of bin indices, sorted. Prints the predicted makespan.
+    def plan_jobs(cfg, outDir, bins, grid_list)
+        uniform = (0...bins).each_slice(cfg[:bins_per_slurm_job]).to_a
+        packing = cfg.fetch(:packing, "auto")
+        return uniform if packing == "uniform"
+        raise "Unknown packing '#{packing}', expected auto, lpt, contiguous or uniform" unless %w[auto lpt contiguous].include?(packing)
+
+        events = load_bin_events(cfg, outDir, bins, grid_list)
+        if events.nil?
+            puts "No event counts per bin found, slicing bins uniformly (set prescan: true to count them)."
+            return uniform
+        end
+        bin_overhead = cfg.fetch(:bin_overhead, DEFAULT_BIN_OVERHEAD)
+        # Every inject call reads the whole tree: charge it the total event count
+        call_overhead = cfg.fetch(:call_overhead, events.sum)
+        costs = events.map { |n| n + bin_overhead }
+        n_jobs = cfg[:n_jobs] || uniform.size
+
+        candidates = {}
+        candidates["contiguous"] = pack_contiguous(costs, n_jobs) if packing != "lpt"
+        candidates["lpt"] = pack_lpt(costs, n_jobs) if packing != "contiguous"
+        chosen, jobs = candidates.min_by { |_, js| makespan(js, costs, call_overhead) }
+        predicted = makespan(jobs, costs, call_overhead)
+        before = makespan(uniform, costs, call_overhead)
+        calls = jobs.sum { |job| contiguous_runs(job).size }
+        ratio = before.to_f / predicted
+        comparison = ratio >= 1 ? "#{ratio.round(1)}x faster" : "#{(1 / ratio).round(1)}x slower"
+        puts "Packed #{bins} bins into #{jobs.size} jobs (#{chosen}, #{calls} inject calls): " \
+             "predicted makespan #{predicted} event-units vs #{before} uniform (#{comparison})."
+        if packing == "lpt" && calls > jobs.size
+            puts "Warning: #{chosen} packing splits #{jobs.size} jobs into #{calls} inject calls, and every call " \
+                 "reads the whole tree (#{call_overhead} event-units each). packing: \"auto\" or \"contiguous\" avoid that."
+        end
+        jobs
+    end
+
+    # Jobs of the previous run in outDir, or nil if none was saved for this table, grid and
+    # number of bins. A new plan can give other bin ranges (e.g. once ALL_INJECTION_RESULTS.csv
+    # exists), and outputs of different ranges would cover some bins twice.
+    def load_job_plan(cfg, outDir, bins)
+        path = File.join(outDir, "job_plan.json")
+        return nil unless File.exist?(path)
+        plan = JSON.parse(File.read(path))
+        return nil unless plan["table"] == cfg[:table] && plan["grid"] == cfg[:grid] && plan["bins"] == bins
+        puts "Resuming with the job plan of the previous run (#{path}): #{plan["jobs"].size} jobs."
+        plan["jobs"]
+    end
+
+    def save_job_plan(cfg, outDir, bins, jobs)
+        plan = { "table" => cfg[:table], "grid" => cfg[:grid], "bins" => bins, "jobs" => jobs }
+        File.write(File.join(outDir, "job_plan.json"), JSON.generate(plan))
+    end
+
+    # Events per bin, or nil when no source is available
+    def load_bin_events(cfg, outDir, bins, grid_list)
+        previous = File.join(outDir, "ALL_INJECTION_RESULTS.csv")
+        if cfg[:bin_costs]
+            source, events = cfg[:bin_costs], read_bin_events(cfg[:bin_costs], bins)
+        elsif File.exist?(previous) && (events = read_bin_events(previous, bins))
+            source = previous
+        elsif (events = table_bin_events(cfg[:table], grid_list, bins))
+            source = "#{cfg[:table]} (events column)"
+        elsif cfg[:prescan]
+            counts_path = File.join(outDir, "bin_counts.csv")
+            cmd = ["python3", "src/binindex.py", cfg[:file], cfg[:tree], cfg[:table], cfg[:grid], "--output", counts_path]
+            puts "\nPre-scanning: #{cmd.join(' ')}\n"
+            system(*cmd) or raise "Pre-scan of #{cfg[:file]} failed."
+            source, events = counts_path, read_bin_events(counts_path, bins)
+        end
+        return nil if events.nil?
+        puts "Bin costs from #{source}: #{events.sum} events, largest bin #{events.max}."
+        events
+    end
+
+    # bin_index,events CSV -> events per bin; nil if it does not cover bins 0...bins
+    def read_bin_events(path, bins)
+        events = Array.new(bins, nil)
+        CSV.foreach(path, headers: true) do |row|
+            next if row["bin_index"].nil? || row["events"].nil?
+            b = row["bin_index"].to_i
+            return nil if b >= bins
+            events[b] = row["events"].to_f.round
+        end
+        # Bins without results (e.g. failed jobs) get the mean of the others
+        known = events.compact
+        return nil if known.empty?
+        mean = known.sum / known.size
+        events.map { |n| n || mean }
+    end
+
+    # Sum of the table's `events` column per bin, with bins numbered like cached_unique_bin_count.
+    # Only for grids that follow the table's variables from the start (X, X,Q, ...): the bins of
+    # other grids (Q alone, Q,X) overlap, so their events are not a sum of table rows.
+    def table_bin_events(table, grid_list, bins)
+        header = CSV.open(table, &:readline)
+        return nil unless header && header.include?("events")
+        variables = header.select { |col| col.end_with?("_min") }.map { |col| col.delete_suffix("_min") }
+        return nil unless variables.first(grid_list.size) == grid_list
+        index = {}
+        events = []
+        CSV.foreach(table, headers: true) do |row|
+            key = grid_list.flat_map { |g| ["#{g}_min", "#{g}_max"].map { |col| row[col].to_f } }
+            b = (index[key] ||= index.size)
+            events[b] = (events[b] || 0) + row["events"].to_f.round
+        end
+        events.size == bins ? events : nil
+    end
+
+    # Longest processing time first: give each bin, largest first, to the least loaded job
+    def pack_lpt(costs, n_jobs)
+        n_jobs = [[n_jobs, costs.size].min, 1].max
+        jobs = Array.new(n_jobs) { [] }
+        loads = Array.new(n_jobs, 0)
+        costs.each_index.sort_by { |b| [-costs[b], b] }.each do |b|
+            j = loads.each_index.min_by { |i| [loads[i], i] }
+            jobs[j] << b
+            loads[j] += costs[b]
+        end
+        jobs.map(&:sort).reject(&:empty?).sort_by(&:first)
+    end
+
+    # Contiguous ranges with the smallest possible makespan (one inject call per job):
+    # binary search on the makespan, filling ranges greedily
+    def pack_contiguous(costs, n_jobs)
+        lo, hi = costs.max, costs.sum
+        while lo < hi
+            mid = (lo + hi) / 2
+            if split_ranges(costs, mid).size <= n_jobs then hi = mid else lo = mid + 1 end
+        end
+        split_ranges(costs, lo)
+    end
+
+    def split_ranges(costs, limit)
+        jobs = [[]]
+        load = 0
+        costs.each_with_index do |c, b|
+            if load + c > limit && !jobs.last.empty?
+                jobs << []
+                load = 0
+            end
+            jobs.last << b
+            load += c
+        end
+        jobs
+    end
+
+    # Largest job cost: its bins plus call_overhead per inject call
+    def makespan(jobs, costs, call_overhead = 0)
+        jobs.map { |job| job.sum { |b| costs[b] } + call_overhead * contiguous_runs(job).size }.max || 0
+    end
+
+    # Sorted bin list -> [[first, last], ...] runs of consecutive bins, one inject call each
+    def contiguous_runs(job)
+        job.slice_when { |a, b| b != a + 1 }.map { |run| [run.first, run.last] }
+    end
+end
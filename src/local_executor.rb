@@ -0,0 +1,94 @@
+#!/usr/bin/env ruby
+require 'etc'
+require 'fileutils'
+require 'yaml'
+
+# Runs injection tasks on the local machine (a workstation or one allocated node) without
+# prompting: up to `workers` tasks at a time, each with its own log file, retrying failures.
+# A task is { name:, cmd: [argv...], output: path }; it succeeds when the command exits 0
+# and leaves a non-empty output file that parses as YAML. The size and mtime of a
+# successful output are then recorded in "<output>.done". With `resume`, tasks whose output
+# still matches that record are skipped, so an interrupted study can be restarted where it
+# stopped; an output left half-written by a killed task has no record and is redone.
+module LocalExecutor
+    # Run the tasks and return the ones that still failed after all retries
+    def run_local(tasks, log_dir, workers: nil, retries: 1, resume: false)
+        pending = resume ? tasks.reject { |task| task_done?(task) } : tasks
+        puts "Resuming: #{tasks.size - pending.size}/#{tasks.size} tasks already have their output." if resume
+        return [] if pending.empty?
+
+        workers = [[workers || Etc.nprocessors, pending.size].min, 1].max
+        FileUtils.mkdir_p(log_dir)
+        puts "Running #{pending.size} tasks on #{workers} local workers, logs in #{log_dir}"
+
+        queue = Queue.new
+        pending.each { |task| queue << task }
+        queue.close
+        failed = []
+        finished = 0
+        mutex = Mutex.new
+        start = Time.now
+        threads = Array.new(workers) do
+            Thread.new do
+                while (task = queue.pop)
+                    ok = run_task(task, log_dir, retries)
+                    mutex.synchronize do
+                        finished += 1
+                        failed << task unless ok
+                        puts "[#{finished}/#{pending.size}] #{ok ? 'done' : 'FAILED'}: #{task[:name]} (#{(Time.now - start).round}s)"
+                    end
+                end
+            end
+        end
+        threads.each(&:join)
+
+        if failed.empty?
+            puts "All #{pending.size} local tasks completed."
+        else
+            puts "#{failed.size} tasks failed: #{failed.map { |task| task[:name] }.join(', ')}"
+            puts "See their logs in #{log_dir}, and rerun with resume: true to retry only these."
+        end
+        failed
+    end
+
+    def task_done?(task)
+        marker = done_marker(task)
+        File.exist?(task[:output]) && File.exist?(marker) && File.read(marker).strip == output_stamp(task[:output])
+    end
+
+    def done_marker(task)
+        "#{task[:output]}.done"
+    end
+
+    def output_stamp(path)
+        "#{File.size(path)} #{File.mtime(path).to_f}"
+    end
+
+    # A complete output: non-empty and parseable (a killed task can leave a truncated file)
+    def valid_output?(path)
+        return false unless File.exist?(path) && File.size(path) > 0
+        YAML.safe_load(File.read(path)).is_a?(Hash)
+    rescue Psych::Exception
+        false
+    end
+
+    # Run one task with up to `retries` retries, appending every attempt to its log
+    def run_task(task, log_dir, retries)
+        log_path = File.join(log_dir, "#{task[:name]}.log")
+        (retries + 1).times do |attempt|
+            FileUtils.rm_f(done_marker(task))
+            status = File.open(log_path, attempt.zero? ? "w" : "a") do |log|
+                log.puts "===== Attempt #{attempt + 1} at #{Time.now}: #{task[:cmd].join(' ')}"
+                log.flush
+                pid = Process.spawn(*task[:cmd], out: log, err: log)
+                Process.wait2(pid).last
+            end
+            if status.success? && valid_output?(task[:output])
+                File.write(done_marker(task), output_stamp(task[:output]))
+                return true
+            end
+            File.open(log_path, "a") { |log| log.puts "===== Attempt #{attempt + 1} failed (#{status})" }
+        end
+        false
+    end
+end
@@ -1,11 +1,76 @@
-import ROOT
+import importlib
 import numpy as np
 from array import array
 from dataio import DataIO
-import pandas as pd
-import glob
+from histfill import HistSpec, edges_from_config, fill_numpy, fill_rdataframe, fill_root_single_pass, hist_contents, set_hist_contents
+from binindex import BinIndex, table_variables
+from histcache import HistCache
+from binning_tables import load_table as load_binning_table
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import os
+import time
 from pathlib import Path
-from PIL import Image
+
+
+class _LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Importing PyROOT takes seconds, so `import plotter` (and the uproot backend,
+    which never needs ROOT) should not pay for it up front.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+ROOT = _LazyModule("ROOT")
+
+
+# Per-process Plotter used by render_bins workers
+_worker_plotter = None
+# Bins whose panels render_bins fills with one pass over the data
+RENDER_BATCH_SIZE = 256
+
+
+def _init_render_worker(data_io, backend, plot_configs, table, use_index, hist_cache=None, filled=None, threads=None):
+    """
+    Create the worker's own Plotter (and so its own TFile) in ROOT batch mode.
+
+    `filled` holds contents the parent already filled (HistSpec.key() -> contents), such
+    as the X-Q2 panel shared by every bin, so the workers do not read them again.
+    `threads` caps the reading threads of the worker (the rdf implicit multithreading),
+    so that the workers together do not use more threads than there are cores.
+    """
+    global _worker_plotter
+    ROOT.gROOT.SetBatch(True)
+    if threads is not None:
+        data_io.workers = threads
+    _worker_plotter = Plotter(data_io, backend=backend)
+    _worker_plotter.plot_configs = plot_configs
+    _worker_plotter.load_table(table)
+    if use_index:
+        _worker_plotter.use_bin_index()
+    if hist_cache is not None:
+        _worker_plotter.use_hist_cache(*hist_cache)
+    if filled:
+        _worker_plotter._filled_max += len(filled)
+        _worker_plotter._filled.update(filled)
+
+
+def _render_bin_worker(bin_number, filled=None):
+    start = time.perf_counter()
+    _worker_plotter.plot_bin_from_table(bin_number, filled=filled)
+    # Canvases are already saved; release them so long-running workers stay flat in memory
+    _worker_plotter._objs.clear()
+    return bin_number, time.perf_counter() - start
 
 
 def style_hist(hist):
@@ -34,18 +99,43 @@ def style_hist(hist):
 
 class Plotter:
     """
-    ROOT-only plotting class that prevents histogram garbage collection.
+    ROOT plotting class that prevents histogram garbage collection.
+
+    Histograms are filled either with TTree::Draw ("root" backend), by streaming
+    branches through uproot and NumPy ("uproot" backend), or by one multithreaded
+    RDataFrame event loop ("rdf" backend); either way they are drawn as TH1F/TH2F.
+    The backend defaults to the one configured on the DataIO.
     """
-    def __init__(self, data_io: DataIO):
+    BACKENDS = ("root", "uproot", "rdf")
+
+    def __init__(self, data_io: DataIO, backend=None):
         self.data_io = data_io
-        self.file = ROOT.TFile.Open(data_io.filepath)
-        self.tree = self.file.Get(data_io.treename)
+        self.backend = backend or data_io.backend
+        if self.backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{self.backend}'. Choose from {self.BACKENDS}.")
+        if self.backend == "root":
+            # A TFile for one input file, a TChain over several
+            self.file, self.tree = data_io.open_tree()
+        else:
+            # The uproot and rdf backends never open a tree themselves
+            self.file = None
+            self.tree = None
         self.table = ""
         self.table_df = None
         # Store objects so they persist
         self._objs = []
         # simple canvas counter to give unique canvas names
         self._canvas_count = 0
+        # (HistSpec, hist) pairs waiting for a single-pass fill; None when filling immediately
+        self._pending_fills = None
+        # Recently filled contents keyed on HistSpec.key(), so repeated identical fills
+        # (e.g. the full X-Q2 panel of every plot_bin_from_table call) skip the tree
+        self._filled = OrderedDict()
+        self._filled_max = 32
+        # Optional per-event index of the table's cells used by plot_bin_from_table
+        self.bin_index = None
+        # Optional on-disk cache of filled histograms, shared across runs
+        self.hist_cache = None
 
         # Configuration dict for TH1F plots
         self.plot_configs = {
@@ -143,7 +233,7 @@ class Plotter:
                 'branch_name': 'PhiH',
                 'x_title': '#phi_{h} [rad]',
                 'y_title': 'Counts',
-                'x_range': (np.pi, np.pi),
+                'x_range': (-np.pi, np.pi),
                 'n_bins': 100,
                 'log_x': False,
                 'log_y': False
@@ -152,7 +242,7 @@ class Plotter:
                 'branch_name': 'PhiRperp',
                 'x_title': '#phi_{R#perp} [rad]',
                 'y_title': 'Counts',
-                'x_range': (np.pi, np.pi),
+                'x_range': (-np.pi, np.pi),
                 'n_bins': 100,
                 'log_x': False,
                 'log_y': False
@@ -161,7 +251,7 @@ class Plotter:
                 'branch_name': 'PhiRT',
                 'x_title': '#phi_{R_{T}} [rad]',
                 'y_title': 'Counts',
-                'x_range': (np.pi, np.pi),
+                'x_range': (-np.pi, np.pi),
                 'n_bins': 100,
                 'log_x': False,
                 'log_y': False
@@ -197,10 +287,43 @@ class Plotter:
         if not os.path.isfile(table_name):
             raise FileNotFoundError(f"Table file '{table_name}' not found.")
         self.table = table_name
-        self.table_df = pd.read_csv(table_name)
+        self.table_df = load_binning_table(table_name).to_dataframe()
+        self._table_vars = table_variables(self.table_df)
+        # Unique bin rectangles per (var_x, var_y) pair, filled lazily by _table_rects
+        self._rect_cache = {}
+        # Group index: (min, max) of the first two variables -> positional rows of that cell
+        self._cell_columns = [f"{var}_{end}" for var in self._table_vars[:2] for end in ("min", "max")]
+        self._cell_rows = self.table_df.groupby(self._cell_columns, sort=False).indices if len(self._table_vars) >= 2 else {}
+        # Cell -> its row in the bin index (the cells in order of first appearance)
+        self._cell_number = {key: i for i, key in enumerate(self._cell_rows)}
+        if len(self._table_vars) >= 2:
+            self._table_rects(self._table_vars[0], self._table_vars[1])
+        self.bin_index = None
         # Summarize loaded table
         print(f"Loaded table '{table_name}' with {len(self.table_df)} rows.")
 
+    def _table_rects(self, var_x, var_y, rows=None):
+        """
+        Unique (xmin, xmax, ymin, ymax) bin rectangles of the loaded table for two variables.
+
+        Q edges are squared so rectangles are drawn in Q2. Rectangles over the full table
+        are cached per variable pair; `rows` restricts to a subset of table rows.
+
+        :return: np.ndarray of shape (n_rects, 4), in order of first appearance
+        """
+        if rows is None and (var_x, var_y) in self._rect_cache:
+            return self._rect_cache[(var_x, var_y)]
+        cols = [f"{var_x}_min", f"{var_x}_max", f"{var_y}_min", f"{var_y}_max"]
+        df = self.table_df if rows is None else self.table_df.iloc[rows]
+        rects = df[cols].drop_duplicates().to_numpy(dtype=float, copy=True)
+        if var_x == 'Q':
+            rects[:, 0:2] **= 2
+        if var_y == 'Q':
+            rects[:, 2:4] **= 2
+        if rows is None:
+            self._rect_cache[(var_x, var_y)] = rects
+        return rects
+
     def update_plot_config(self, bin_name, config_updates):
         """
         Update or add configuration for a specific bin_name in plot_configs.
@@ -217,17 +340,158 @@ class Plotter:
         self._objs.append(obj)
         return obj
 
-    def plot_th2f(self, pad=None, bin_x_name=None, bin_y_name=None, cut="Weight", bin_rects=None, special_bin_rect=None):
+    def use_bin_index(self, branches=None, rebuild=False):
         """
-        Plot a TH2F histogram using two entries in plot_configs.
+        Build (or load from disk) the per-event bin index for the loaded table.
 
-        :param pad: ROOT.TPad to draw on (optional)
-        :param bin_x_name: key in plot_configs for the X-axis variable
-        :param bin_y_name: key in plot_configs for the Y-axis variable
-        :param cut: cut string for the tree draw
+        Once attached, the per-bin panels of plot_bin_from_table are filled from the
+        index instead of scanning the tree. The index is cached next to the ROOT file.
+
+        The index is keyed on the cells of the first two table variables, in tree units
+        (Q2, not Q) and with the closed [min, max] cuts of the tree path, so a cell holds
+        exactly the events the tree cut selects and both paths fill the same contents.
+
+        :param branches: Branches to store; defaults to those of the per-bin panels
+        :param rebuild: Force a rebuild even if a matching index exists
         """
+        if self.table_df is None:
+            raise ValueError("Table not loaded. Use load_table() first.")
+        if branches is None:
+            branches = sorted(self._panel_spec(self._bin_panels(0)[0][1]).branches())
+        cells = self.table_df[self._cell_columns].drop_duplicates()
+        if 'Q' in self._table_vars[:2]:
+            cells = cells.rename(columns={'Q_min': 'Q2_min', 'Q_max': 'Q2_max'})
+            cells[['Q2_min', 'Q2_max']] **= 2
+        self.bin_index = BinIndex.load_or_build(
+            self.data_io, cells, self.table, branches=branches, rebuild=rebuild, closed=True,
+            directory=BinIndex.default_directory(self.data_io, self.table, tag="cells"))
+        return self.bin_index
+
+    def use_hist_cache(self, directory=None, max_bytes=256 * 1024 ** 2):
+        """
+        Cache filled histograms on disk so later runs skip the tree.
+
+        Entries are keyed on the ROOT file (path, mtime, size), tree, expressions, cut and
+        binning, so re-styling a plot reuses its contents while any change to the data or
+        the plot_configs binning refills it.
+
+        :param directory: Cache directory; defaults to <file stem>.histcache next to the ROOT file
+        :param max_bytes: Size limit; the least recently used entries are evicted beyond it
+        """
+        self.hist_cache = HistCache(directory or HistCache.default_directory(self.data_io),
+                                    self.data_io, max_bytes=max_bytes)
+        return self.hist_cache
+
+    def invalidate_hist_cache(self, spec=None):
+        """
+        Drop cached contents: of one HistSpec, or everything (in memory and on disk) when `spec` is None.
+        """
+        if spec is None:
+            self._filled.clear()
+        else:
+            self._filled.pop(spec.key(), None)
+        if self.hist_cache is not None:
+            self.hist_cache.invalidate(spec)
+
+    def _remember(self, spec, hist, store=True):
+        contents = hist_contents(hist)
+        self._filled[spec.key()] = contents
+        while len(self._filled) > self._filled_max:
+            self._filled.popitem(last=False)
+        if store and self.hist_cache is not None:
+            self.hist_cache.put(spec, *contents)
+
+    def _fill(self, spec, hist, option="goff"):
+        """
+        Fill `hist` from the tree according to `spec`.
+
+        Identical fills are served from memory or the on-disk histogram cache, and fills
+        restricted to bin index rows are served by the index when one is attached. Inside a batched plot_combo the
+        remaining fills are only booked, and all of them are filled together by a single
+        pass over the tree once every pad is drawn.
+        """
+        key = spec.key()
+        if key in self._filled:
+            self._filled.move_to_end(key)
+            set_hist_contents(hist, *self._filled[key])
+            return
+        if self.hist_cache is not None:
+            contents = self.hist_cache.get(spec)
+            if contents is not None:
+                set_hist_contents(hist, *contents)
+                self._remember(spec, hist, store=False)
+                return
+        if spec.rows is not None and self.bin_index is not None:
+            try:
+                chunk = self.bin_index.events(spec.rows, spec.branches())
+            except KeyError:
+                pass
+            else:
+                set_hist_contents(hist, *fill_numpy([chunk], [spec])[0])
+                return
+        if self._pending_fills is not None:
+            self._pending_fills.append((spec, hist))
+            return
+        if self.backend in ("uproot", "rdf"):
+            self._fill_batch([(spec, hist)])
+            return
+        draw_cmd = f"{spec.draw_expression()} >> {hist.GetName()}"
+        self.tree.Draw(draw_cmd, spec.selection(), option)
+        self._remember(spec, hist)
+
+    def _fill_batch(self, fills):
+        """
+        Fill a list of (HistSpec, hist) pairs with one pass over the data.
+        """
+        if self.backend == "uproot":
+            specs = [spec for spec, _ in fills]
+            branches = set().union(*(spec.branches() for spec in specs))
+            results = fill_numpy(self.data_io.iterate(branches), specs)
+            for (_, hist), contents in zip(fills, results):
+                set_hist_contents(hist, *contents)
+        elif self.backend == "rdf":
+            fill_rdataframe(self.data_io, fills)
+        else:
+            fill_root_single_pass(self.tree, fills)
+        for spec, hist in fills:
+            self._remember(spec, hist)
+
+    def cross_check_backends(self, bin_names, backends=("root", "rdf"), rtol=1e-6):
+        """
+        Fill the same plot_configs histograms with several backends and compare the contents.
+
+        :param bin_names: plot_configs keys to fill (1D, weighted like plot_th1f)
+        :param backends: Backends to compare; the first one is the reference
+        :param rtol: Relative tolerance of the comparison
+        :return: dict mapping backend -> {bin_name: max absolute difference to the reference}
+        """
+        specs = []
+        for bin_name in bin_names:
+            config = self.plot_configs[bin_name]
+            specs.append(HistSpec(f"xcheck_{bin_name}", config.get('branch_name', bin_name),
+                                  edges_from_config(config, config['log_x'], bin_name)))
+
+        contents = {}
+        for backend in backends:
+            plotter = Plotter(self.data_io, backend=backend)
+            hists = [ROOT.TH1D(f"{spec.name}_{backend}", "", len(spec.x_edges) - 1, array('d', spec.x_edges)) for spec in specs]
+            plotter._fill_batch(list(zip(specs, hists)))
+            contents[backend] = [hist_contents(h)[0] for h in hists]
 
-        # --- Validate configs ---
+        reference = contents[backends[0]]
+        report = {}
+        for backend in backends[1:]:
+            report[backend] = {}
+            for bin_name, ref, other in zip(bin_names, reference, contents[backend]):
+                report[backend][bin_name] = float(np.max(np.abs(other - ref))) if len(ref) else 0.0
+                if not np.allclose(other, ref, rtol=rtol, atol=0):
+                    print(f"[WARNING] {bin_name}: {backend} differs from {backends[0]} by up to {report[backend][bin_name]}")
+        return report
+
+    def _th2f_spec(self, bin_x_name, bin_y_name, cut="Weight", ranges=None, rows=None):
+        """
+        Return the HistSpec that plot_th2f fills for these arguments.
+        """
         if bin_x_name not in self.plot_configs:
             raise ValueError(f"X-axis bin '{bin_x_name}' not found in plot_configs.")
         if bin_y_name not in self.plot_configs:
@@ -235,9 +499,25 @@ class Plotter:
 
         cfg_x = self.plot_configs[bin_x_name]
         cfg_y = self.plot_configs[bin_y_name]
+        return HistSpec(f"h_{bin_x_name}_vs_{bin_y_name}",
+                        cfg_x.get('branch_name', bin_x_name), edges_from_config(cfg_x, cfg_x['log_x'], bin_x_name),
+                        cfg_y.get('branch_name', bin_y_name), edges_from_config(cfg_y, cfg_y['log_y'], bin_y_name),
+                        weight=cut, ranges=ranges or (), rows=rows)
 
-        branch_x = cfg_x.get('branch_name', bin_x_name)
-        branch_y = cfg_y.get('branch_name', bin_y_name)
+    def plot_th2f(self, pad=None, bin_x_name=None, bin_y_name=None, cut="Weight", bin_rects=None, special_bin_rect=None, ranges=None, rows=None):
+        """
+        Plot a TH2F histogram using two entries in plot_configs.
+
+        :param pad: ROOT.TPad to draw on (optional)
+        :param bin_x_name: key in plot_configs for the X-axis variable
+        :param bin_y_name: key in plot_configs for the Y-axis variable
+        :param cut: cut string for the tree draw
+        :param ranges: optional list of (branch, min, max) selections applied on top of `cut`
+        :param rows: optional bin index rows holding exactly the events of `ranges`, read instead of the tree if an index is attached
+        """
+        spec = self._th2f_spec(bin_x_name, bin_y_name, cut=cut, ranges=ranges, rows=rows)
+        cfg_x = self.plot_configs[bin_x_name]
+        cfg_y = self.plot_configs[bin_y_name]
 
         x_min, x_max = cfg_x['x_range']
         y_min, y_max = cfg_y['x_range']
@@ -249,19 +529,11 @@ class Plotter:
         # (We treat log_z automatically below)
 
         # --- Create binning ---
-        if log_x:
-            x_bins = array('d', np.logspace(np.log10(x_min), np.log10(x_max), nx+1))
-        else:
-            x_bins = array('d', np.linspace(x_min, x_max, nx+1))
-
-        if log_y:
-            y_bins = array('d', np.logspace(np.log10(y_min), np.log10(y_max), ny+1))
-        else:
-            y_bins = array('d', np.linspace(y_min, y_max, ny+1))
+        x_bins = array('d', spec.x_edges)
+        y_bins = array('d', spec.y_edges)
 
         # --- Create histogram ---
-        hist_name = f"h_{bin_x_name}_vs_{bin_y_name}"
-        h = ROOT.TH2F(hist_name, "",
+        h = ROOT.TH2F(spec.name, "",
                        len(x_bins)-1, x_bins,
                        len(y_bins)-1, y_bins)
 
@@ -270,8 +542,7 @@ class Plotter:
             pad.cd()
 
         # --- Draw tree data ---
-        draw_cmd = f"{branch_y}:{branch_x} >> {hist_name}"
-        self.tree.Draw(draw_cmd, cut, "COLZ")
+        self._fill(spec, h, "COLZ")
         h.SetDirectory(0)
         # --- Log scales ---
         if log_x:
@@ -287,7 +558,7 @@ class Plotter:
         style_hist(h)
         h.Draw("COLZ")
         # --- Draw bin rectangles if provided ---
-        if bin_rects:
+        if bin_rects is not None and len(bin_rects):
             # get current canvas/pad to attach primitives if needed
             try:
                 canvas = ROOT.gPad.GetCanvas()
@@ -354,13 +625,12 @@ class Plotter:
             pad.cd()
 
         hist_name = f"h_{bin_name}"
+        bin_edges = edges_from_config(config, log_x, bin_name)
         if log_x:
-            bin_edges = array('d', np.logspace(np.log10(x_min), np.log10(x_max), n_bins+1))
-            h = ROOT.TH1F(hist_name, "", n_bins, bin_edges)
+            h = ROOT.TH1F(hist_name, "", n_bins, array('d', bin_edges))
         else:
             h = ROOT.TH1F(hist_name, "", n_bins, x_min, x_max)
-        draw_cmd = f"{branch_name} >> {hist_name}"
-        self.tree.Draw(draw_cmd, "Weight", "goff")
+        self._fill(HistSpec(hist_name, branch_name, bin_edges), h)
         h.SetDirectory(0)
 
         if log_x:
@@ -375,10 +645,14 @@ class Plotter:
         h.Draw("hist")
         return self._keep(h)
 
-    def plot_combo(self, plot_funcs, ncols=1, suptitle=None, output_name="combo_plot.png"):
+    def plot_combo(self, plot_funcs, ncols=1, suptitle=None, output_name="combo_plot.png", single_pass=True):
         """
         plot_funcs: list of callables or tuples (callable, kwargs_dict)
         Each func should accept pad as a keyword argument.
+
+        With single_pass=True every histogram requested by the pads is booked first and
+        all of them are filled by one pass over the tree before the canvas is saved.
+        Set single_pass=False to fall back to one TTree::Draw per pad.
         """
         n = len(plot_funcs)
         nrows = (n + ncols - 1) // ncols
@@ -387,16 +661,30 @@ class Plotter:
         canvas = ROOT.TCanvas(cname, cname, 400*ncols, 400*nrows)
         canvas.Divide(ncols, nrows)
 
-        for i, item in enumerate(plot_funcs, start=1):
-            canvas.cd(i)
-            ROOT.gStyle.SetOptStat(0)
-            if callable(item):
-                item(pad=ROOT.gPad)
-            elif isinstance(item, tuple) and len(item) == 2:
-                func, kwargs = item
-                func(pad=ROOT.gPad, **kwargs)
-            else:
-                raise ValueError("plot_funcs items must be callables or (callable, kwargs_dict) tuples")
+        if single_pass:
+            self._pending_fills = []
+        try:
+            for i, item in enumerate(plot_funcs, start=1):
+                canvas.cd(i)
+                ROOT.gStyle.SetOptStat(0)
+                if callable(item):
+                    item(pad=ROOT.gPad)
+                elif isinstance(item, tuple) and len(item) == 2:
+                    func, kwargs = item
+                    func(pad=ROOT.gPad, **kwargs)
+                else:
+                    raise ValueError("plot_funcs items must be callables or (callable, kwargs_dict) tuples")
+            pending_fills = self._pending_fills
+        finally:
+            self._pending_fills = None
+
+        if pending_fills:
+            # Histograms are already attached to their pads, fill them and repaint
+            self._fill_batch(pending_fills)
+            for i in range(1, n + 1):
+                canvas.cd(i)
+                ROOT.gPad.Modified()
+            canvas.Update()
 
         if suptitle:
             canvas.SetTitle(suptitle)
@@ -408,11 +696,33 @@ class Plotter:
 
         return self._keep(canvas)
 
-    def plot_bin_from_table(self, bin_number):
+    def plot_bin_from_table(self, bin_number, filled=None):
         """
         Plot 2D distributions for a specific bin from the loaded table.
 
+        The second panel selects events with closed [min, max] cuts on the first two
+        variables only. When a bin index is attached (use_bin_index) the same events are
+        read from the index row of that cell instead of the tree.
+
         :param bin_number: The bin number (row index in the table)
+        :param filled: Optional contents of this bin's panels (HistSpec.key() -> contents) from
+            prefill_bins; they are used for drawing and then dropped from memory
+        """
+        panels, suptitle = self._bin_panels(bin_number)
+        plot_funcs = [lambda pad=None, kwargs=kwargs: self.plot_th2f(pad=pad, **kwargs) for kwargs in panels]
+        added = [key for key in (filled or {}) if key not in self._filled]
+        self._filled_max += len(added)
+        self._filled.update((key, filled[key]) for key in added)
+        try:
+            self.plot_combo(plot_funcs, ncols=2, suptitle=suptitle, output_name=f"bin_{bin_number}_plots.png")
+        finally:
+            for key in added:
+                self._filled.pop(key, None)
+            self._filled_max -= len(added)
+
+    def _bin_panels(self, bin_number):
+        """
+        Return the plot_th2f keyword arguments of the two panels of a table bin, and the title.
         """
         if self.table_df is None:
             raise ValueError("Table not loaded. Use load_table() first.")
@@ -420,17 +730,8 @@ class Plotter:
         if bin_number >= len(self.table_df):
             raise ValueError(f"Bin number {bin_number} out of range. Table has {len(self.table_df)} rows.")
 
-        columns = self.table_df.columns
         row = self.table_df.iloc[bin_number]
-        # Find unique prefaces for _min and _max
-        prefaces_list = []
-        for col in columns:
-            if col.endswith('_min') and col[:-4] not in prefaces_list:
-                prefaces_list.append(col[:-4])  # Remove '_min'
-
-        
-        
-
+        prefaces_list = self._table_vars
 
         if len(prefaces_list) < 2:
             raise ValueError("Need at least two variables with _min/_max columns.")
@@ -438,10 +739,8 @@ class Plotter:
         # Mapping for variable names (e.g., Q -> Q2)
         name_mapping = {'Q': 'Q2'}
 
-        # Create cut string based on the bin
-        # Also, get subtable cut for first two variables
-        subtable = self.table_df.copy()
-        cuts = []
+        # Create cut ranges based on the bin
+        ranges = []
         special_bin_rect = []
         for pref in prefaces_list[:2]:
             mapped_name = name_mapping.get(pref, pref)
@@ -450,64 +749,191 @@ class Plotter:
             if mapped_name == "Q2":
                 special_bin_rect.append(min_val**2)
                 special_bin_rect.append(max_val**2)
-                cuts.append(f"{mapped_name} >= {min_val**2} && {mapped_name} <= {max_val**2}")
+                ranges.append((mapped_name, min_val**2, max_val**2))
             else:
                 special_bin_rect.append(min_val)
                 special_bin_rect.append(max_val)
-                cuts.append(f"{mapped_name} >= {min_val} && {mapped_name} <= {max_val}")
-            subtable = subtable[(subtable[f"{pref}_min"] == min_val) & (subtable[f"{pref}_max"] == max_val)]
-            
-
-        cut_str = " && ".join(cuts)
-        cut_str = "(" + cut_str + ") * Weight"
-        # Plot functions for plot_combo
-        plot_funcs = []
-
-        # Define function to get unique rectangles for binning
-        def _unique_rects_for(var_x, var_y, use_subtable=False):
-            rects = []
-            if use_subtable:
-                for _, r in subtable.iterrows():
-                    xmin = r[f"{var_x}_min"]
-                    xmax = r[f"{var_x}_max"]
-                    ymin = r[f"{var_y}_min"]
-                    ymax = r[f"{var_y}_max"]
-                    if (xmin, xmax, ymin, ymax) not in rects:
-                        rects.append((xmin, xmax, ymin, ymax))
-            else:
-                for _, r in self.table_df.iterrows():
-                    xmin = r[f"{var_x}_min"]
-                    xmax = r[f"{var_x}_max"]
-                    ymin = r[f"{var_y}_min"]**2 # Q--> Q2
-                    ymax = r[f"{var_y}_max"]**2 # Q--> Q2
-                    if (xmin, xmax, ymin, ymax) not in rects:
-                        rects.append((xmin, xmax, ymin, ymax))
-            return rects
-        # Print the full subtable
-        # First two variables
+                ranges.append((mapped_name, min_val, max_val))
+
+        # Rows sharing this bin's cell in the first two variables, and its bin index row
+        cell_key = tuple(row[col] for col in self._cell_columns)
+        rows = self._cell_rows[cell_key]
+        cell = self._cell_number[cell_key]
+
+        # First two variables: the full distribution, the same for every bin
         var1, var2 = prefaces_list[0], prefaces_list[1]
         x1 = name_mapping.get(var1, var1)
         y1 = name_mapping.get(var2, var2)
-        rects_12 = _unique_rects_for(var1, var2)
-        plot_funcs.append(lambda pad=None, x=x1, y=y1, c="Weight", rects=rects_12: self.plot_th2f(pad=pad, bin_x_name=x, bin_y_name=y, cut=c, bin_rects=rects, special_bin_rect=special_bin_rect))
+        panels = [dict(bin_x_name=x1, bin_y_name=y1, cut="Weight",
+                       bin_rects=self._table_rects(var1, var2), special_bin_rect=special_bin_rect)]
 
-        # Last two variables
+        # Last two variables, inside the bin
         var3, var4 = prefaces_list[-2], prefaces_list[-1]
         x2 = name_mapping.get(var3, var3)
         y2 = name_mapping.get(var4, var4)
-        rects_34 = _unique_rects_for(var3, var4, use_subtable=True)
-        plot_funcs.append(lambda pad=None, x=x2, y=y2, c=cut_str, rects=rects_34: self.plot_th2f(pad=pad, bin_x_name=x, bin_y_name=y, cut=c, bin_rects=rects))
+        panels.append(dict(bin_x_name=x2, bin_y_name=y2, ranges=ranges, rows=[cell],
+                           bin_rects=self._table_rects(var3, var4, rows=rows)))
 
-        # Use plot_combo to display both plots
         suptitle = f"Bin {bin_number}: {x1} vs {y1} and {x2} vs {y2}"
-        self.plot_combo(plot_funcs, ncols=2, suptitle=suptitle, output_name=f"bin_{bin_number}_plots.png")
+        return panels, suptitle
+
+    def _panel_spec(self, panel):
+        """HistSpec of a _bin_panels entry."""
+        return self._th2f_spec(panel['bin_x_name'], panel['bin_y_name'], cut=panel.get('cut', "Weight"),
+                               ranges=panel.get('ranges'), rows=panel.get('rows'))
+
+    def _prefill(self, specs):
+        """
+        Fill HistSpecs ahead of drawing, all with one pass over the data, and keep their
+        contents in memory so that drawing them later does not read the tree again.
+
+        Specs already in memory or in the histogram cache are not refilled, and specs
+        the bin index will serve are left to it.
+
+        :return: dict mapping HistSpec.key() -> contents of every spec
+        """
+        unique = list({spec.key(): spec for spec in specs}.values())
+        self._filled_max = max(self._filled_max, len(unique) + 32)
+        todo = []
+        for spec in unique:
+            if spec.key() in self._filled:
+                continue
+            contents = self.hist_cache.get(spec) if self.hist_cache is not None else None
+            if contents is not None:
+                self._filled[spec.key()] = contents
+            elif spec.rows is None or self.bin_index is None:
+                todo.append(spec)
+        if todo:
+            if self.backend == "uproot":
+                branches = set().union(*(spec.branches() for spec in todo))
+                for spec, contents in zip(todo, fill_numpy(self.data_io.iterate(branches), todo)):
+                    self._filled[spec.key()] = contents
+                    if self.hist_cache is not None:
+                        self.hist_cache.put(spec, *contents)
+            else:
+                fills = []
+                for i, spec in enumerate(todo):
+                    name = f"{spec.name}_prefill{i}"
+                    if spec.is_2d:
+                        hist = ROOT.TH2D(name, "", len(spec.x_edges) - 1, array('d', spec.x_edges),
+                                         len(spec.y_edges) - 1, array('d', spec.y_edges))
+                    else:
+                        hist = ROOT.TH1D(name, "", len(spec.x_edges) - 1, array('d', spec.x_edges))
+                    hist.SetDirectory(0)
+                    fills.append((spec, hist))
+                self._fill_batch(fills)
+        return {spec.key(): self._filled[spec.key()] for spec in unique if spec.key() in self._filled}
 
-    def make_bin_plots_gif(self, output_name: str = "bin_plots.gif", duration: float = 0.2):
+    def prefill_bins(self, bin_numbers):
+        """
+        Fill the panels of many table bins together, before drawing them.
+
+        All the panels are booked first and filled with a single pass over the data: one
+        RDataFrame event loop (RunGraphs) with the rdf backend, one chunked read with
+        uproot and one TTreeFormula loop with root, instead of one per bin. Panels served
+        by the bin index or the histogram cache are not refilled.
+
+        :param bin_numbers: Iterable of table row indices
+        :return: dict mapping bin number -> {HistSpec.key(): contents} of its panels, to pass
+            to plot_bin_from_table(bin_number, filled=...)
+        """
+        specs = {b: [self._panel_spec(panel) for panel in self._bin_panels(b)[0]] for b in bin_numbers}
+        filled = self._prefill([spec for bin_specs in specs.values() for spec in bin_specs])
+        # Keep the per-bin panels only in the returned dict, so their memory is released as
+        # the bins are drawn; panels shared by every bin stay in memory
+        for bin_specs in specs.values():
+            for spec in bin_specs:
+                if spec.ranges:
+                    self._filled.pop(spec.key(), None)
+        return {b: {spec.key(): filled[spec.key()] for spec in bin_specs if spec.key() in filled}
+                for b, bin_specs in specs.items()}
+
+    def render_bins(self, bin_numbers, workers=None, batch_size=RENDER_BATCH_SIZE):
+        """
+        Render `bin_{n}_plots.png` for many table bins, spread over worker processes.
+
+        Each worker opens its own TFile and runs ROOT in batch mode, with a copy of this
+        Plotter's plot_configs, table and (if attached) bin index. The X-Q2 panel shared by
+        every bin is filled once here and handed to the workers. The per-bin panels are
+        filled here too, `batch_size` bins at a time with one pass over the data each (see
+        prefill_bins), and every worker receives the contents of the bins it draws; the
+        next batch is filled while the workers draw the current one. The output files are
+        the same as calling plot_bin_from_table for every bin.
+
+        :param bin_numbers: Iterable of table row indices to render
+        :param workers: Number of worker processes (default: os.cpu_count()); 1 renders in this process
+        :param batch_size: Bins filled per pass over the data; bounds the contents held in memory
+        :return: List of dicts with 'bin', 'seconds' and 'path', sorted by bin
+        """
+        if self.table_df is None:
+            raise ValueError("Table not loaded. Use load_table() first.")
+        bin_numbers = list(bin_numbers)
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, len(bin_numbers)) if bin_numbers else 1
+        out_dir = self.data_io.get_output_dir()
+
+        batches = [bin_numbers[i:i + batch_size] for i in range(0, len(bin_numbers), batch_size)]
+
+        timings = {}
+        start = time.perf_counter()
+        if workers == 1:
+            for batch in batches:
+                for bin_number, filled in self.prefill_bins(batch).items():
+                    t0 = time.perf_counter()
+                    self.plot_bin_from_table(bin_number, filled=filled)
+                    timings[bin_number] = time.perf_counter() - t0
+        elif bin_numbers:
+            # spawn, not fork: a forked ROOT interpreter is not safe to reuse
+            context = multiprocessing.get_context("spawn")
+            hist_cache = None if self.hist_cache is None else (self.hist_cache.directory, self.hist_cache.max_bytes)
+            # Panels without a per-bin selection are the same for every bin: fill them once here
+            shared = self._prefill([self._panel_spec(panel) for panel in self._bin_panels(bin_numbers[0])[0]
+                                    if not panel.get('ranges')])
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            initargs = (self.data_io, self.backend, self.plot_configs, self.table, self.bin_index is not None,
+                        hist_cache, shared, threads)
+
+            def collect(futures):
+                for future in as_completed(futures):
+                    bin_number, seconds = future.result()
+                    timings[bin_number] = seconds
+                    print(f"[INFO] Rendered bin {bin_number} in {seconds:.2f} s ({len(timings)}/{len(bin_numbers)})")
+
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_render_worker, initargs=initargs) as pool:
+                running = []
+                for batch in batches:
+                    submitted = []
+                    for bin_number, filled in self.prefill_bins(batch).items():
+                        filled = {key: contents for key, contents in filled.items() if key not in shared}
+                        submitted.append(pool.submit(_render_bin_worker, bin_number, filled))
+                    # At most two batches of contents in memory: wait for the previous one
+                    collect(running)
+                    running = submitted
+                collect(running)
+        elapsed = time.perf_counter() - start
+
+        results = [{'bin': b, 'seconds': timings[b], 'path': out_dir / f"bin_{b}_plots.png"} for b in sorted(timings)]
+        if results:
+            per_bin = np.array([r['seconds'] for r in results])
+            print(f"[INFO] Rendered {len(results)} bins with {workers} worker(s) in {elapsed:.1f} s "
+                  f"(per bin: mean {per_bin.mean():.2f} s, max {per_bin.max():.2f} s)")
+        return results
+
+    def make_bin_plots_gif(self, output_name: str = "bin_plots.gif", duration: float = 0.2,
+                           step: int = 1, scale: float = 1.0, workers: int = 0):
         """
         Find all files matching `bin_*_plots.png` under `out_dir` (recursively) and make an animated GIF.
 
-        :param output_name: Name of the output GIF file to write (will be placed inside out_dir)
+        Frames are decoded, resized and quantized one at a time and appended to the
+        output as they arrive, so memory does not grow with the number of bins.
+        An output name ending in .mp4 or .webm is encoded with a local ffmpeg instead.
+
+        :param output_name: Name of the output file to write (will be placed inside out_dir)
         :param duration: Frame duration in seconds (default 0.2 == 200ms)
+        :param step: Use every step-th bin plot (default 1 == all)
+        :param scale: Resize factor applied to every frame (e.g. 0.5 halves width and height)
+        :param workers: Number of threads decoding frames ahead of the writer (0 == decode inline)
         :return: Path to the created GIF as a pathlib.Path
         """
         base = Path(self.data_io.get_output_dir())
@@ -521,22 +947,97 @@ class Plotter:
         import re
         def natural_sort_key(s):
             return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', str(s))]
-        files = sorted([p for p in base.rglob(pattern)], key=natural_sort_key)
+        files = sorted([p for p in base.rglob(pattern)], key=natural_sort_key)[::step]
 
         if not files:
             raise FileNotFoundError(f"No files matching '{pattern}' found under '{base}'")
 
-        images = [Image.open(f) for f in files]
         out_path = base / output_name
+        from PIL import Image
+
+        # All frames share the (scaled) size of the first one
+        with Image.open(files[0]) as first:
+            size = (max(1, round(first.width * scale)), max(1, round(first.height * scale)))
+
+        if out_path.suffix.lower() in (".mp4", ".webm"):
+            n_frames = _write_video(out_path, _iter_frames(files, size, "RGB", workers), size, 1.0 / duration)
+            print(f"Created video with {n_frames} frames: {out_path}")
+            return out_path
 
-        # Save GIF using Pillow
-        images[0].save(
-            out_path,
-            save_all=True,
-            append_images=images[1:],
-            duration=int(duration * 1000),  # Convert seconds to milliseconds
-            loop=0
-        )
+        from PIL import GifImagePlugin
+        ms = int(duration * 1000)  # Convert seconds to milliseconds
+        n_frames = 0
+        with open(out_path, "wb") as fp:
+            for frame in _iter_frames(files, size, "P", workers):
+                if n_frames == 0:
+                    header, _ = GifImagePlugin.getheader(frame.copy(), info={"loop": 0, "duration": ms})
+                    fp.write(b"".join(header))
+                # Every frame carries its own local palette
+                fp.write(b"".join(GifImagePlugin.getdata(frame, duration=ms, include_color_table=True)))
+                n_frames += 1
+            fp.write(b";")  # GIF trailer
 
-        print(f"Created GIF with {len(images)} frames: {out_path}")
+        print(f"Created GIF with {n_frames} frames: {out_path}")
         return out_path
+
+
+def _load_frame(path, size, mode):
+    """Decode one bin plot, resize it to `size` and convert it to RGB or a quantized palette image."""
+    from PIL import Image
+
+    with Image.open(path) as im:
+        frame = im.convert("RGB")
+    if frame.size != size:
+        frame = frame.resize(size, Image.LANCZOS)
+    if mode == "P":
+        frame = frame.quantize(colors=256)
+    return frame
+
+
+def _iter_frames(files, size, mode, workers=0):
+    """
+    Yield decoded frames in order, keeping at most 2*workers frames in flight.
+    """
+    if not workers:
+        for f in files:
+            yield _load_frame(f, size, mode)
+        return
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for f in files:
+            pending.append(pool.submit(_load_frame, f, size, mode))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _write_video(out_path, frames, size, fps):
+    """
+    Pipe RGB frames into a local ffmpeg to encode MP4 (H.264) or WebM (VP9).
+
+    :return: Number of frames written
+    """
+    import shutil
+    import subprocess
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg not found in PATH; write a .gif instead or install ffmpeg.")
+    codec = ["-c:v", "libvpx-vp9"] if out_path.suffix.lower() == ".webm" else ["-c:v", "libx264"]
+    cmd = [ffmpeg, "-y", "-loglevel", "error",
+           "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{size[0]}x{size[1]}", "-r", f"{fps:g}", "-i", "-",
+           # yuv420p needs even dimensions
+           "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", *codec, "-pix_fmt", "yuv420p", str(out_path)]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    n_frames = 0
+    try:
+        for frame in frames:
+            proc.stdin.write(frame.tobytes())
+            n_frames += 1
+    finally:
+        proc.stdin.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed with exit code {proc.returncode}")
+    return n_frames
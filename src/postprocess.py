@@ -1,9 +1,329 @@
 import os
-import yaml
+import sys
+import glob
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
+# yaml and matplotlib are imported where they are used: a cached run reads no YAML,
+# and table-only runs draw nothing.
+
+# Directory in each injectout directory holding the parsed results (see PostProcessor.save_cache)
+CACHE_DIR = ".postprocess_cache"
+CACHE_VERSION = 1
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_yaml_jobs(file_path):
+    """
+    Parse one injection YAML file and return its list of job entries.
+
+    Module-level so it can run in worker processes. Uses libyaml's C loader
+    when PyYAML was built with it.
+    """
+    import yaml
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(file_path, 'r') as f:
+        data = yaml.load(f, Loader=loader)
+    if data and 'jobs' in data:
+        return data['jobs']
+    return []
+
+# Per-injection lists in the YAML jobs, stored as RaggedArray instead of DataFrame cells
+TRIAL_COLUMNS = ('all_extracted', 'all_errors')
+
+
+class RaggedArray:
+    """
+    Variable-length float64 rows stored in one contiguous buffer.
+
+    Row i is values[offsets[i]:offsets[i+1]] (a CSR-like layout), so per-row statistics
+    are computed with a few vectorized operations over all rows at once.
+    """
+
+    def __init__(self, values, offsets):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    @classmethod
+    def from_lists(cls, lists):
+        """Build from a sequence of lists (None counts as an empty row)."""
+        lengths = np.fromiter((len(x) if x is not None else 0 for x in lists), dtype=np.int64, count=len(lists))
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        values = np.fromiter((v for x in lists if x is not None for v in x), dtype=np.float64, count=int(offsets[-1]))
+        return cls(values, offsets)
+
+    @classmethod
+    def concatenate(cls, arrays):
+        """Stack the rows of several RaggedArrays."""
+        arrays = list(arrays)
+        values = np.concatenate([a.values for a in arrays]) if arrays else np.empty(0)
+        lengths = np.concatenate([a.lengths for a in arrays]) if arrays else np.empty(0, dtype=np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(values, offsets)
+
+    def take(self, rows):
+        """New RaggedArray with the given rows, in the given order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = self.lengths[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        shift = np.repeat(self.offsets[rows] - offsets[:-1], lengths)
+        return RaggedArray(self.values[np.arange(offsets[-1]) + shift], offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """Read-only view of row i, so callers cannot corrupt the shared buffer (and the saved cache)."""
+        row = self.values[self.offsets[i]:self.offsets[i + 1]]
+        row.flags.writeable = False
+        return row
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def row_ids(self):
+        """Row number of every value in the buffer."""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def sum(self):
+        return np.bincount(self.row_ids(), weights=self.values, minlength=len(self))
+
+    def mean(self):
+        """Per-row mean (NaN for empty rows)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.sum() / self.lengths
+
+    def std(self):
+        """Per-row population standard deviation, like np.std (NaN for empty rows)."""
+        mean = self.mean()
+        ids = self.row_ids()
+        squares = np.bincount(ids, weights=(self.values - mean[ids]) ** 2, minlength=len(self))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(squares / self.lengths)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.offsets.nbytes
+
+
+def set_batch_mode():
+    """
+    Switch matplotlib to the non-interactive Agg backend.
+
+    Used by PostProcessor(batch=True) so unattended runs never open windows or
+    import a GUI toolkit; plots are only written to files.
+    """
+    import matplotlib
+    # Not guarded by get_backend(): resolving the default backend can itself import a GUI toolkit
+    matplotlib.use('Agg')
+
+
+def save_figure(fig, path, formats=('png',), show=False):
+    """
+    Save a figure in one or more formats and release it.
+
+    Args:
+        fig (matplotlib.figure.Figure): Figure to save
+        path (str): Output path without extension
+        formats (tuple): Extensions to write, e.g. ('png',) or ('png', 'pdf')
+        show (bool): Call plt.show() before closing (interactive use)
+
+    Returns:
+        list: The saved paths
+    """
+    import matplotlib.pyplot as plt
+
+    paths = []
+    for fmt in formats:
+        paths.append(f"{path}.{fmt}")
+        fig.savefig(paths[-1])
+        print(f"[INFO] Saved {paths[-1]}")
+    if show:
+        plt.show()
+    plt.close(fig)
+    return paths
+
+
+# Keys of the combined table of batch_postprocess, in injectout/<channel>/<energy>/... order
+DIRECTORY_TERMS = ('channel', 'energy', 'eic_timeline', 'target', 'grid')
+
+
+def discover_injection_directories(root):
+    """
+    Find every injectout/<channel>/<energy>/<timeline>/<target>/<grid> directory.
+
+    Args:
+        root (str): An injectout directory, or a directory containing injectout
+            directories (e.g. analysis/ or analysis/yorgo/)
+
+    Returns:
+        list: Sorted paths of the grid directories holding YAML files or a result cache
+    """
+    if os.path.basename(os.path.normpath(root)) == 'injectout':
+        roots = [root]
+    else:
+        roots = sorted(dirpath for dirpath, dirnames, _ in os.walk(root)
+                       if os.path.basename(dirpath) == 'injectout')
+    directories = []
+    for injectout in roots:
+        pattern = os.path.join(glob.escape(injectout), *['*'] * len(DIRECTORY_TERMS))
+        for directory in sorted(glob.glob(pattern)):
+            if not os.path.isdir(directory):
+                continue
+            if os.path.isdir(os.path.join(directory, CACHE_DIR)) or any(
+                    f.endswith('.yaml') for f in os.listdir(directory)):
+                directories.append(directory)
+    return directories
+
+
+def process_directory(directory, save_csv=True, plots=False, formats=('png',)):
+    """
+    Post-process one injectout directory and return its results table.
+
+    Module-level so directories can be processed in worker processes. Runs in
+    batch mode: plots are written with the Agg backend and never shown.
+
+    Args:
+        directory (str): injectout grid directory
+        save_csv (bool): Also write the directory's ALL_INJECTION_RESULTS.csv
+        plots (bool): Also write the plots (the pull heatmap for grids over 100 bins)
+        formats (tuple): Plot file formats
+
+    Returns:
+        tuple: (terms dict, results DataFrame from PostProcessor.get_results)
+    """
+    processor = PostProcessor(directory, workers=1, batch=True, formats=formats)
+    if save_csv:
+        processor.save_to_csv()
+    if plots:
+        if len(processor.df) > 100:
+            processor.plot_bins(summary='pull')
+        else:
+            processor.plot_bins(workers=1)
+            processor.plot_asymmetry()
+    return processor.terms, processor.get_results()
+
+
+def batch_postprocess(directories, workers=None, save_csv=True, output_path=None, plots=False, formats=('png',)):
+    """
+    Post-process many injectout directories concurrently into one table.
+
+    Args:
+        directories (str or list): Directories to process, or a root directory
+            searched with discover_injection_directories
+        workers (int): Processes, one directory each (default: all cores, 1 = serial)
+        save_csv (bool): Also write each directory's ALL_INJECTION_RESULTS.csv
+        output_path (str): Optional .csv or .parquet path for the combined table
+        plots (bool): Also write each directory's plots, headless (see process_directory)
+        formats (tuple): Plot file formats, e.g. ('png',) or ('pdf',)
+
+    Returns:
+        pd.DataFrame: All results indexed by (channel, energy, eic_timeline, target, grid, bin_index)
+    """
+    if isinstance(directories, str):
+        directories = discover_injection_directories(directories)
+    print(f"[INFO] Post-processing {len(directories)} directories")
+
+    workers = workers or os.cpu_count() or 1
+    if len(directories) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(directories))) as pool:
+            n = len(directories)
+            results = list(pool.map(process_directory, directories, [save_csv] * n, [plots] * n, [formats] * n))
+    else:
+        results = [process_directory(directory, save_csv, plots, formats) for directory in directories]
+
+    tables = {tuple(terms[k] for k in DIRECTORY_TERMS): df for terms, df in results if not df.empty}
+    if not tables:
+        return pd.DataFrame()
+    combined = pd.concat(tables, names=list(DIRECTORY_TERMS))
+    if output_path:
+        if output_path.endswith('.parquet'):
+            combined.to_parquet(output_path)
+        else:
+            combined.to_csv(output_path)
+        print(f"[INFO] Saved {len(combined)} bins from {len(tables)} directories to {output_path}")
+    return combined
+
+
+def plot_bins_page(page, show=False):
+    """
+    Render one page of PostProcessor.plot_bins and save it.
+
+    Module-level so pages can be rendered in worker processes.
+
+    Args:
+        page (dict): 'bins' as a list of (bin_index, mean_extracted, stddev_extracted,
+            extracted values, errors), 'title', output 'path' (without extension)
+            and 'formats'
+        show (bool): Show the figure before closing it
+
+    Returns:
+        list: The saved paths
+    """
+    import matplotlib.pyplot as plt
+
+    num_bins = len(page['bins'])
+    num_cols = min(5, num_bins)  # Maximum 5 columns
+    num_rows = (num_bins + num_cols - 1) // num_cols  # Calculate rows needed
+
+    fig, axes = plt.subplots(num_rows, num_cols, figsize=(6 * num_cols, 5 * num_rows), squeeze=False)
+    axes = axes.flatten()
+
+    for ax, (bin_index, mean_extracted, stddev_extracted, all_extracted, all_errors) in zip(axes, page['bins']):
+        if len(all_extracted) == 0 or len(all_errors) == 0:
+            ax.text(0.5, 0.5, 'No data', ha='center', va='center', fontsize=12)
+            ax.axis('off')
+            continue
+
+        n_points = len(all_extracted)
+        y_values = np.arange(n_points)  # Spaced out y values
+
+        # Data points with x error bars, drawn as two collections instead of one errorbar artist per point
+        point_alpha = 1 if n_points < 50 else 0.5
+        point_size = 6 if n_points < 50 else 3
+        ax.hlines(y_values, all_extracted - all_errors, all_extracted + all_errors, color="black", alpha=point_alpha)
+        ax.scatter(all_extracted, y_values, s=point_size ** 2, color="black", alpha=point_alpha,
+                   label='Data points (w/ exp. error)')
+
+        # Plot mean_extracted with 1-sigma error band
+        ax.axvline(mean_extracted, color='blue', linestyle='dotted', label='Mean extracted')
+        ax.axvspan(mean_extracted - stddev_extracted, mean_extracted + stddev_extracted,
+                   color='blue', alpha=0.2, label='1-sigma band')
+
+        # Calculate error in the mean by hand
+        error_in_mean = stddev_extracted / np.sqrt(n_points)
+        ax.axvspan(mean_extracted - error_in_mean, mean_extracted + error_in_mean,
+                   color='black', alpha=0.2, label='Error in mean')
+
+        ax.set_title(f"Bin {bin_index}")
+        ax.set_xlabel("Extracted Value")
+        ax.set_ylabel("Trial Index")
+        ax.legend()
+
+    # Turn off unused subplots
+    for ax in axes[num_bins:]:
+        ax.axis('off')
+
+    fig.suptitle(page['title'], fontsize=16)
+    fig.tight_layout()
+    return save_figure(fig, page['path'], page['formats'], show=show)
+
+
 class PostProcessor:
     """
     A class for post-processing YAML files containing bin data from injection analysis.
@@ -12,19 +332,68 @@ class PostProcessor:
     and provides methods to access the data as a pandas DataFrame or print summaries.
     """
     
-    def __init__(self, directory):
+    def __init__(self, directory, workers=None, use_cache=True, batch=False, formats=('png',)):
         """
         Initialize the PostProcessor with a directory containing YAML files.
         
         Args:
             directory (str): Path to the directory containing YAML files with bin data
+            workers (int): Processes used to parse YAML files (default: all cores)
+            use_cache (bool): Reuse and update the result cache of the directory
+            batch (bool): Non-interactive mode: use the Agg backend and never call plt.show()
+            formats (tuple): File formats written by the plot methods, e.g. ('png', 'pdf')
         """
+        self._reset(directory, batch, formats)
+        self.load_bins(workers=workers, use_cache=use_cache)
+        self.create_dataframe()
+        if use_cache:
+            self.save_cache()
+        self.terms = self.collect_directory_terms()
+
+    def _reset(self, directory, batch=False, formats=('png',)):
         self.directory = directory
+        self.batch = batch
+        self.formats = tuple(formats)
+        if batch:
+            set_batch_mode()
         self.bins = []
         self.df = None
-        self.load_bins()
-        self.create_dataframe()
-        self.terms = self.collect_directory_terms()
+        # Per-injection results, one row per DataFrame row (see create_dataframe)
+        self.extracted = RaggedArray.from_lists([])
+        self.errors = RaggedArray.from_lists([])
+        # YAML file each DataFrame row was read from
+        self.sources = np.empty(0, dtype=object)
+        self._bin_sources = []
+        # Rows reused from the cache, and the YAML files behind the current results
+        self._reused = None
+        self._files = {}
+        self.cache_changed = False
+
+    @classmethod
+    def from_cache(cls, directory, batch=False, formats=('png',)):
+        """
+        Load the results from the cache of a directory without reading any YAML file.
+
+        Args:
+            directory (str): injectout directory that was processed before
+            batch (bool): Non-interactive mode, as in __init__
+            formats (tuple): Plot file formats, as in __init__
+
+        Returns:
+            PostProcessor: with the DataFrame and trials of the last cached run
+        """
+        processor = cls.__new__(cls)
+        processor._reset(directory, batch, formats)
+        cache_dir = os.path.join(directory, CACHE_DIR)
+        manifest = processor._read_manifest(cache_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No result cache in {directory}")
+        processor._files = manifest['files']
+        processor._reused = processor._read_cache(cache_dir, manifest)
+        processor.create_dataframe()
+        processor.terms = processor.collect_directory_terms()
+        print(f"[INFO] {directory}: loaded {len(processor.df)} bins from cache")
+        return processor
 
     def collect_directory_terms(self):
         """
@@ -47,45 +416,226 @@ class PostProcessor:
         }
         return terms
 
-    def load_bins(self):
+    def load_bins(self, workers=None, use_cache=True):
         """
         Load bin data from all YAML files in the specified directory.
         
         This method scans the directory for .yaml files, parses them, and collects
-        all job entries into self.bins. The bins are sorted by bin_index.
+        all job entries into self.bins.
+
+        Files are identified by a SHA-256 of their contents (only recomputed when
+        the mtime or size changed). With use_cache, the rows of files already in
+        the result cache are reused from it and only new or changed files are
+        parsed, with the C YAML loader when available and spread over a process pool.
+
+        Args:
+            workers (int): Processes used to parse YAML files (default: all cores, 1 = serial)
+            use_cache (bool): Reuse unchanged files from the result cache
         """
         if not os.path.isdir(self.directory):
             print(f"Error: {self.directory} is not a valid directory")
             return
 
-        yaml_files = [f for f in os.listdir(self.directory) if f.endswith('.yaml')]
+        yaml_files = sorted(f for f in os.listdir(self.directory) if f.endswith('.yaml'))
+        cache_dir = os.path.join(self.directory, CACHE_DIR)
+        manifest = self._read_manifest(cache_dir) if use_cache else None
+        cached_files = manifest['files'] if manifest else {}
 
+        files = {}
         for yaml_file in yaml_files:
-            file_path = os.path.join(self.directory, yaml_file)
-            try:
-                with open(file_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    if 'jobs' in data:
-                        self.bins.extend(data['jobs'])
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-
-        # Sort bins by bin_index
-        self.bins.sort(key=lambda x: x['bin_index'])
+            path = os.path.join(self.directory, yaml_file)
+            stat = os.stat(path)
+            entry = cached_files.get(yaml_file)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                digest = entry['sha256']
+            else:
+                digest = file_digest(path)
+            files[yaml_file] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': digest}
+
+        reused = [f for f in yaml_files if f in cached_files and cached_files[f]['sha256'] == files[f]['sha256']]
+        to_parse = [f for f in yaml_files if f not in reused]
+        if manifest is not None and reused:
+            self._reused = self._read_cache(cache_dir, manifest, keep=reused)
+
+        paths = [os.path.join(self.directory, f) for f in to_parse]
+        workers = workers or os.cpu_count() or 1
+        if len(paths) > 1 and workers > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+                futures = [pool.submit(parse_yaml_jobs, path) for path in paths]
+                results = []
+                for path, future in zip(paths, futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        print(f"Error reading {path}: {e}")
+                        results.append(None)
+        else:
+            results = []
+            for path in paths:
+                try:
+                    results.append(parse_yaml_jobs(path))
+                except Exception as e:
+                    print(f"Error reading {path}: {e}")
+                    results.append(None)
+
+        self._bin_sources = []
+        for yaml_file, jobs in zip(to_parse, results):
+            if jobs is None:
+                # Unreadable file: leave it out of the cache so it is retried next time
+                del files[yaml_file]
+                continue
+            self.bins.extend(jobs)
+            self._bin_sources.extend([yaml_file] * len(jobs))
+
+        self.cache_changed = manifest is None or files != cached_files
+        self._files = files
+        print(f"[INFO] {self.directory}: parsed {len(to_parse)} YAML file(s), "
+              f"reused {len(reused)} from cache")
+
+    @staticmethod
+    def _read_manifest(cache_dir):
+        """Return the cache manifest, or None if missing, unreadable or outdated."""
+        try:
+            with open(os.path.join(cache_dir, "manifest.json"), 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != CACHE_VERSION:
+            return None
+        return manifest
+
+    @staticmethod
+    def _read_cache(cache_dir, manifest, keep=None):
+        """
+        Read the cached results, optionally only the rows of the YAML files in `keep`.
+
+        Returns:
+            tuple: (DataFrame with a bin_index column, extracted RaggedArray,
+            errors RaggedArray, sources array)
+        """
+        table_path = os.path.join(cache_dir, manifest['table'])
+        if table_path.endswith('.parquet'):
+            df = pd.read_parquet(table_path)
+        else:
+            df = pd.read_pickle(table_path)
+        sources = df.pop('_source').to_numpy(dtype=object)
+        extracted = RaggedArray(np.load(os.path.join(cache_dir, "extracted_values.npy")),
+                                np.load(os.path.join(cache_dir, "extracted_offsets.npy")))
+        errors = RaggedArray(np.load(os.path.join(cache_dir, "errors_values.npy")),
+                             np.load(os.path.join(cache_dir, "errors_offsets.npy")))
+        if keep is not None and len(keep) != len(manifest['files']):
+            rows = np.flatnonzero(np.isin(sources, list(keep)))
+            df = df.iloc[rows].reset_index(drop=True)
+            extracted, errors, sources = extracted.take(rows), errors.take(rows), sources[rows]
+        return df, extracted, errors, sources
+
+    def save_cache(self):
+        """
+        Write the results to the cache directory if they changed.
+
+        The scalar columns go to results.parquet (a pickle if no Parquet engine is
+        installed) and the per-injection trials to .npy buffers and offsets.
+        manifest.json, written last, records the SHA-256 of every YAML file.
+        """
+        if not self.cache_changed:
+            return
+        cache_dir = os.path.join(self.directory, CACHE_DIR)
+        os.makedirs(cache_dir, exist_ok=True)
+        manifest_path = os.path.join(cache_dir, "manifest.json")
+        # Invalidate first, so an interrupted write is never mistaken for a complete cache
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+        table = self.df.reset_index() if self.df is not None and not self.df.empty else pd.DataFrame({'bin_index': []})
+        table['_source'] = self.sources
+        try:
+            table.to_parquet(os.path.join(cache_dir, "results.parquet"), index=False)
+            table_name = "results.parquet"
+        except ImportError:
+            table.to_pickle(os.path.join(cache_dir, "results.pkl"))
+            table_name = "results.pkl"
+        np.save(os.path.join(cache_dir, "extracted_values.npy"), self.extracted.values)
+        np.save(os.path.join(cache_dir, "extracted_offsets.npy"), self.extracted.offsets)
+        np.save(os.path.join(cache_dir, "errors_values.npy"), self.errors.values)
+        np.save(os.path.join(cache_dir, "errors_offsets.npy"), self.errors.offsets)
+
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'table': table_name, 'files': self._files}, f)
+        os.replace(tmp_path, manifest_path)
+        self.cache_changed = False
+        print(f"[INFO] Saved result cache to {cache_dir}")
 
     def create_dataframe(self):
         """
         Create a pandas DataFrame from the loaded bin data.
         
-        The DataFrame is indexed by bin_index and contains all columns
-        present in the YAML data (events, X_min, X_max, etc.).
+        The DataFrame is indexed by bin_index, sorted, and contains all scalar columns
+        present in the YAML data (events, X_min, X_max, etc.). The per-injection
+        all_extracted/all_errors lists are moved into the RaggedArrays
+        self.extracted and self.errors, whose rows follow the DataFrame rows,
+        and are dropped from self.bins to release the Python lists.
+        Rows reused from the result cache are merged with the newly parsed ones.
         """
-        if not self.bins:
+        parts = []
+        if self._reused is not None:
+            parts.append(self._reused)
+            self._reused = None
+        if self.bins:
+            extracted = RaggedArray.from_lists([b.get('all_extracted') for b in self.bins])
+            errors = RaggedArray.from_lists([b.get('all_errors') for b in self.bins])
+            self.bins = [{k: v for k, v in b.items() if k not in TRIAL_COLUMNS} for b in self.bins]
+            sources = np.array(self._bin_sources, dtype=object)
+            parts.append((pd.DataFrame(self.bins), extracted, errors, sources))
+        parts = [part for part in parts if len(part[0])]
+        if not parts:
             self.df = pd.DataFrame()
             return
 
-        self.df = pd.DataFrame(self.bins)
-        self.df.set_index('bin_index', inplace=True)
+        df = pd.concat([part[0] for part in parts], ignore_index=True)
+        order = np.argsort(df['bin_index'].to_numpy(), kind='stable')
+        self.df = df.iloc[order].set_index('bin_index')
+        self.extracted = RaggedArray.concatenate(part[1] for part in parts).take(order)
+        self.errors = RaggedArray.concatenate(part[2] for part in parts).take(order)
+        self.sources = np.concatenate([part[3] for part in parts])[order]
+
+    def get_trials(self, bin_index):
+        """
+        Get the per-injection results of one bin.
+
+        Args:
+            bin_index (int): Bin index as in the DataFrame index
+
+        Returns:
+            tuple: (extracted values, errors) as read-only views into the shared buffers
+        """
+        i = self.df.index.get_loc(bin_index)
+        return self.extracted[i], self.errors[i]
+
+    def trial_statistics(self):
+        """
+        Per-bin statistics of the injection trials, computed for all bins at once.
+
+        Returns:
+            pd.DataFrame: indexed by bin_index with n_trials, mean, std, stderr
+            (std / sqrt(n_trials)), mean_error (mean of all_errors) and pull
+            ((mean - injected) / stderr)
+        """
+        n_trials = self.extracted.lengths
+        mean = self.extracted.mean()
+        std = self.extracted.std()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stderr = std / np.sqrt(n_trials)
+            injected = self.df['injected'].to_numpy(dtype=float) if 'injected' in self.df else np.full(len(mean), np.nan)
+            pull = (mean - injected) / stderr
+        return pd.DataFrame({
+            'n_trials': n_trials,
+            'mean': mean,
+            'std': std,
+            'stderr': stderr,
+            'mean_error': self.errors.mean(),
+            'pull': pull,
+        }, index=self.df.index)
 
     def get_dataframe(self):
         """
@@ -96,10 +646,17 @@ class PostProcessor:
         """
         return self.df
 
-    def save_to_csv(self):
+    def get_results(self):
         """
-        Save the DataFrame to a CSV file.
+        Get the results table written by save_to_csv.
+
+        Returns:
+            pd.DataFrame: The bin data with the asymmetry columns renamed
+            (injected_asymmetry, reconstructed_asymmetry, ...) and the
+            reconstructed_asymmetry_err column added
         """
+        if self.df is None or self.df.empty:
+            return pd.DataFrame()
 
         output_df = self.df.copy()
         output_df["injected_asymmetry"] = output_df["injected"]
@@ -108,7 +665,14 @@ class PostProcessor:
         output_df["reconstructed_asymmetry_err"] = output_df["stddev_extracted"] / np.sqrt(output_df["events"])
 
         # Drop unnecessary columns
-        output_df.drop(columns=["mean_extracted", "stddev_extracted","all_extracted","all_errors", "injected"], inplace=True)
+        output_df.drop(columns=["mean_extracted", "stddev_extracted", "injected"], inplace=True)
+        return output_df
+
+    def save_to_csv(self):
+        """
+        Save the DataFrame to a CSV file.
+        """
+        output_df = self.get_results()
 
         if output_df is None or output_df.empty:
             print("No data to save")
@@ -130,73 +694,114 @@ class PostProcessor:
         print("DataFrame contents:")
         print(self.df)
 
-    def plot_bins(self):
+    def plot_bins(self, bins_per_page=25, workers=None, summary=None):
         """
-        Plot the bin data in a grid of subplots.
+        Plot the bin data in pages of subplots.
 
         Each subplot corresponds to a bin and shows data points with x error bars.
         A vertical dotted line represents the mean_extracted value with a red faded
         transparent 1-sigma error band.
+
+        Up to bins_per_page bins are drawn per figure, so the figure size does not grow
+        with the number of bins. A single page is saved as asym_bin_extractions.png,
+        several pages as asym_bin_extractions_page<N>.png, rendered in parallel
+        (with the extensions of self.formats).
+
+        Args:
+            bins_per_page (int): Bins per page (5 subplot columns per page)
+            workers (int): Processes rendering pages (default: all cores, 1 = serial)
+            summary (str): Instead of the per-bin pages, draw one heatmap of this
+                trial statistic (see plot_summary_heatmap)
         """
         if self.df is None or self.df.empty:
             print("No data to plot")
             return
+        if summary is not None:
+            self.plot_summary_heatmap(summary)
+            return
 
+        title = ", ".join([f"{k}: {v}" for k, v in self.terms.items()])
         num_bins = len(self.df)
-        num_cols = min(5, num_bins)  # Maximum 5 columns
-        num_rows = (num_bins + num_cols - 1) // num_cols  # Calculate rows needed
-
-        fig, axes = plt.subplots(num_rows, num_cols, figsize=(6 * num_cols, 5 * num_rows))
-        axes = axes.flatten()  # Flatten in case of multiple rows
-
-        for i, (bin_index, row) in enumerate(self.df.iterrows()):
-            ax = axes[i]
-
-            # Extract data for plotting
-            all_extracted = row.get('all_extracted', [])
-            all_errors = row.get('all_errors', [])
-            mean_extracted = row.get('mean_extracted', 0)
-            stddev_extracted = row.get('stddev_extracted', 0)
-
-            if not all_extracted or not all_errors:
-                ax.text(0.5, 0.5, 'No data', ha='center', va='center', fontsize=12)
-                ax.axis('off')
-                continue
-
-            y_values = np.arange(len(all_extracted))  # Spaced out y values
-
-            # Plot data points with error bars
-            point_alpha = 1 if len(all_extracted) < 50 else 0.5
-            point_size = 6 if len(all_extracted) < 50 else 3
-            ax.errorbar(all_extracted, y_values, xerr=all_errors, fmt='o', color="black", label='Data points (w/ exp. error)', alpha=point_alpha, markersize=point_size)
-
-            # Plot mean_extracted with 1-sigma error band
-            ax.axvline(mean_extracted, color='blue', linestyle='dotted', label='Mean extracted')
-            ax.fill_betweenx(y_values, mean_extracted - stddev_extracted, mean_extracted + stddev_extracted,
-                             color='blue', alpha=0.2, label='1-sigma band')
+        num_pages = (num_bins + bins_per_page - 1) // bins_per_page
+        mean_extracted = self.df['mean_extracted'].to_numpy() if 'mean_extracted' in self.df else np.zeros(num_bins)
+        stddev_extracted = self.df['stddev_extracted'].to_numpy() if 'stddev_extracted' in self.df else np.zeros(num_bins)
+
+        pages = []
+        for page in range(num_pages):
+            rows = range(page * bins_per_page, min((page + 1) * bins_per_page, num_bins))
+            if num_pages == 1:
+                path = os.path.join(self.directory, "asym_bin_extractions")
+            else:
+                path = os.path.join(self.directory, f"asym_bin_extractions_page{page + 1:0{len(str(num_pages))}d}")
+            pages.append({
+                'bins': [(self.df.index[i], mean_extracted[i], stddev_extracted[i],
+                          self.extracted[i], self.errors[i]) for i in rows],
+                'title': title if num_pages == 1 else f"{title} ({page + 1}/{num_pages})",
+                'path': path,
+                'formats': self.formats,
+            })
+
+        workers = workers or os.cpu_count() or 1
+        if num_pages > 1 and workers > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, num_pages)) as pool:
+                for _ in pool.map(plot_bins_page, pages):
+                    pass
+        else:
+            for page in pages:
+                plot_bins_page(page, show=num_pages == 1 and not self.batch)
+
+    def plot_summary_heatmap(self, statistic='pull'):
+        """
+        Plot one trial statistic of every bin as a heatmap.
 
-            # Calculate error in the mean by hand
-            n_points = len(all_extracted)
-            if n_points > 0:
-                error_in_mean = stddev_extracted / np.sqrt(n_points)
-                ax.fill_betweenx(y_values, mean_extracted - error_in_mean, mean_extracted + error_in_mean,
-                                 color='black', alpha=0.2, label='Error in mean')
+        Rows are the combinations of the other grid variables in bin_index order,
+        columns the rank of the last grid variable's bin inside its row, so a
+        10,000 bin X,Q,Z,Mh grid is a 1000 x 10 image.
 
-            
-            ax.set_title(f"Bin {bin_index}")
-            ax.set_xlabel("Extracted Value")
-            ax.set_ylabel("Trial Index")
-            ax.legend()
+        Args:
+            statistic (str): A column of trial_statistics() (n_trials, mean, std,
+                stderr, mean_error, pull) or of the DataFrame
+        """
+        if self.df is None or self.df.empty:
+            print("No data to plot")
+            return
 
-        # Turn off unused subplots
-        for j in range(i + 1, len(axes)):
-            axes[j].axis('off')
+        stats = self.trial_statistics()
+        values = stats[statistic] if statistic in stats else self.df[statistic]
+        grid = [g for g in self.terms['grid'].split(',') if f"{g}_min" in self.df]
+        if grid:
+            inner = f"{grid[-1]}_min"
+            outer = [f"{g}_min" for g in grid[:-1]]
+            # Edges of a hierarchical table differ in every parent bin, so the column is
+            # the rank of the bin inside its parent group rather than its inner edge
+            if outer:
+                groups = self.df.groupby(outer, sort=False)
+                col = (groups[inner].rank(method='dense') - 1).to_numpy(dtype=int)
+                row = groups.ngroup().to_numpy()
+            else:
+                col = np.searchsorted(np.unique(self.df[inner].to_numpy()), self.df[inner].to_numpy())
+                row = np.zeros(len(self.df), dtype=int)
+        else:
+            col = np.arange(len(self.df))
+            row = np.zeros(len(self.df), dtype=int)
+        image = np.full((row.max() + 1, col.max() + 1), np.nan)
+        image[row, col] = values.to_numpy(dtype=float)
+
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=(10, 8))
+        if statistic == 'pull':
+            limit = np.nanmax(np.abs(image[np.isfinite(image)])) if np.isfinite(image).any() else 1
+            mesh = ax.imshow(image, aspect='auto', origin='lower', interpolation='nearest',
+                             cmap='RdBu_r', vmin=-limit, vmax=limit)
+        else:
+            mesh = ax.imshow(image, aspect='auto', origin='lower', interpolation='nearest')
+        fig.colorbar(mesh, ax=ax, label=statistic)
+        ax.set_title(", ".join([f"{k}: {v}" for k, v in self.terms.items()]))
+        ax.set_xlabel(f"{grid[-1]} bin" if grid else "Bin Index")
+        ax.set_ylabel(f"{','.join(grid[:-1])} bin" if len(grid) > 1 else "")
 
-        fig.suptitle(", ".join([f"{k}: {v}" for k, v in self.terms.items()]), fontsize=16)
         plt.tight_layout()
-        plt.savefig(os.path.join(self.directory, "asym_bin_extractions.png"))
-        print(f"[INFO] Saved {os.path.join(self.directory, 'asym_bin_extractions.png')}")
-        plt.show()
+        save_figure(fig, os.path.join(self.directory, f"asym_bin_summary_{statistic}"), self.formats, show=not self.batch)
 
     def plot_asymmetry(self):
         """
@@ -214,14 +819,16 @@ class PostProcessor:
 
         bin_indices = self.df.index
         mean_extracted = self.df['mean_extracted']
-        all_errors_mean = self.df['all_errors'].apply(lambda x: np.mean(x) if isinstance(x, list) else 0)
+        stats = self.trial_statistics()
+        all_errors_mean = stats['mean_error'].fillna(0)
         stddev_extracted = self.df['stddev_extracted']
-        n_points = self.df['all_extracted'].apply(lambda x: len(x) if isinstance(x, list) else 0)
+        n_points = stats['n_trials']
         true_asymmetry = self.df['injected']
 
         # Calculate standard error of the mean
         error_in_mean = stddev_extracted / np.sqrt(n_points)
 
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(figsize=(10, 6))
 
         # Scatter plot for mean_extracted
@@ -243,6 +850,16 @@ class PostProcessor:
         ax.legend()
 
         plt.tight_layout()
-        plt.savefig(os.path.join(self.directory, "asymmetry_vs_bin_index.png"))
-        print(f"[INFO] Saved {os.path.join(self.directory, 'asymmetry_vs_bin_index.png')}")
-        plt.show()
+        save_figure(fig, os.path.join(self.directory, "asymmetry_vs_bin_index"), self.formats, show=not self.batch)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 src/postprocess.py <root or injectout directory> [output.csv|output.parquet]")
+        sys.exit(1)
+    combined = batch_postprocess(sys.argv[1], output_path=sys.argv[2] if len(sys.argv) > 2 else None, plots=True)
+    print(combined)
+
+
+if __name__ == "__main__":
+    main()